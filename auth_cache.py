@@ -0,0 +1,113 @@
+import asyncio
+import os
+import re
+import time
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+from browser_pool import BrowserPool
+
+LOGIN_URL = "https://app.powerbi.com/singleSignOn?experience=power-bi&ru="
+HOME_URL = "https://app.powerbi.com/home?experience=power-bi"
+
+# Where the logins are cached and how long a cached login is trusted
+AUTH_STATE_DIR = Path(os.getenv("AUTH_STATE_DIR", ".auth"))
+AUTH_STATE_TTL_HOURS = float(os.getenv("AUTH_STATE_TTL_HOURS", "8"))
+
+LOGIN_HOSTS = ("login.microsoftonline.com", "login.live.com", "login.windows.net")
+
+logger = logging.getLogger(__name__)
+
+
+def is_login_url(url):
+    return "/singleSignOn" in url or any(host in url for host in LOGIN_HOSTS)
+
+
+def iter_accounts():
+    """Yield (user_id, username, password) for every PBI_USERNAME_n in the environment."""
+    user_ids = sorted(int(m.group(1)) for m in (re.fullmatch(r"PBI_USERNAME_(\d+)", k) for k in os.environ) if m)
+    for user_id in user_ids:
+        yield user_id, os.getenv(f"PBI_USERNAME_{user_id}"), os.getenv(f"PBI_PASSWORD_{user_id}")
+
+
+async def sign_in(page, report_url, username, password):
+    """Walk the Power BI single sign-on flow and land on report_url."""
+    await page.goto(LOGIN_URL + report_url)
+    await page.get_by_role("textbox", name="Enter email").fill(username)
+    await page.get_by_role("button", name="Submit").click()
+    await page.get_by_role("textbox", name="Enter the password for").fill(password)
+    await page.get_by_role("button", name="Sign in").click()
+    await page.get_by_role("button", name="Yes").click()
+
+
+class AuthCache:
+    """Playwright storage_state per PBI account, kept on disk until it expires or is rejected."""
+
+    def __init__(self, state_dir=AUTH_STATE_DIR, ttl_hours=AUTH_STATE_TTL_HOURS):
+        self.state_dir = Path(state_dir)
+        self.ttl_seconds = ttl_hours * 3600
+
+    def path(self, username):
+        return self.state_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', username)}.json"
+
+    def load(self, username):
+        """Return the cached state file for new_context(storage_state=...), or None if missing/expired."""
+        if not username:
+            return None
+        path = self.path(username)
+        if path.exists() and time.time() - path.stat().st_mtime < self.ttl_seconds:
+            return str(path)
+        return None
+
+    def invalidate(self, username):
+        self.path(username).unlink(missing_ok=True)
+
+    async def save(self, context, username):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        await context.storage_state(path=str(self.path(username)))
+
+    async def open_report(self, page, report_url, username, password):
+        """Open report_url reusing the cached login; sign in again only if the cached state is rejected.
+
+        Returns True when the cached state was accepted.
+        """
+        if self.load(username):
+            await page.goto(report_url)
+            landed = page.locator("visual-container").first.or_(page.locator("input[type='email'], input[type='password']")).first
+            await landed.wait_for(state="attached")
+            if not is_login_url(page.url):
+                return True
+            logger.info(f"[{username}] Cached login rejected, signing in again...")
+            self.invalidate(username)
+
+        await sign_in(page, report_url, username, password)
+        await page.wait_for_url(lambda url: not is_login_url(url))
+        await self.save(page.context, username)
+        return False
+
+
+AUTH_CACHE = AuthCache()
+
+
+async def warm_up(cache=AUTH_CACHE):
+    """Sign every account from users.env in once so the load runs start on cached logins."""
+    pool = await BrowserPool().start()
+    try:
+        for user_id, username, password in iter_accounts():
+            if not password or cache.load(username):
+                continue
+            async with pool.context(locale='en-US', user_agent='PlaywrightTestAgent') as context:
+                page = await context.new_page()
+                try:
+                    await cache.open_report(page, HOME_URL, username, password)
+                    logger.info(f"✅ [User {user_id}] Login cached at {cache.path(username)}")
+                except Exception as e:
+                    logger.error(f"❌ [User {user_id}] Login failed: {e}")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    load_dotenv("users.env")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    asyncio.run(warm_up())
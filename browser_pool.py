@@ -0,0 +1,83 @@
+import asyncio
+import os
+import logging
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+# Isolated contexts one Chromium hosts before the pool launches another
+CONTEXTS_PER_BROWSER = int(os.getenv("CONTEXTS_PER_BROWSER", "5"))
+HEADLESS = os.getenv("HEADLESS", "false").lower() in ("1", "true", "yes")
+# Virtual users one xdist worker runs concurrently, in one test, on its pool (default: one full browser)
+USERS_PER_WORKER = max(1, int(os.getenv("USERS_PER_WORKER", str(CONTEXTS_PER_BROWSER))))
+
+logger = logging.getLogger(__name__)
+
+
+def workers_for(users, users_per_worker=USERS_PER_WORKER):
+    """The `pytest -n` that gives every group of users_per_worker users its own worker."""
+    return max(1, -(-int(users) // users_per_worker))
+
+
+class BrowserPool:
+    """Hands out isolated BrowserContexts from a small number of long-lived browsers.
+
+    One pool lives per pytest(-xdist) worker. A browser is launched lazily only when
+    every running browser already hosts `contexts_per_browser` open contexts, so a worker
+    that runs many virtual users pays for one Playwright driver and a handful of
+    Chromium processes instead of one of each per user.
+    """
+
+    def __init__(self, contexts_per_browser=CONTEXTS_PER_BROWSER, headless=HEADLESS, **launch_options):
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.headless = headless
+        self.launch_options = launch_options
+        self._playwright = None
+        self._browsers = {}  # browser -> number of contexts currently open on it
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        return self
+
+    async def _acquire_browser(self):
+        async with self._lock:
+            for browser in list(self._browsers):
+                if not browser.is_connected():
+                    logger.warning("⚠️ Dropping disconnected browser from the pool.")
+                    del self._browsers[browser]
+                elif self._browsers[browser] < self.contexts_per_browser:
+                    self._browsers[browser] += 1
+                    return browser
+
+            browser = await self._playwright.chromium.launch(headless=self.headless, **self.launch_options)
+            self._browsers[browser] = 1
+            logger.info(f"🚀 Launched browser #{len(self._browsers)} (up to {self.contexts_per_browser} contexts each).")
+            return browser
+
+    def _release_browser(self, browser):
+        if browser in self._browsers:
+            self._browsers[browser] -= 1
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """Yield a fresh BrowserContext; it is closed (and its HAR flushed) on exit."""
+        browser = await self._acquire_browser()
+        try:
+            context = await browser.new_context(**context_options)
+            try:
+                yield context
+            finally:
+                await context.close()
+        finally:
+            self._release_browser(browser)
+
+    async def close(self):
+        for browser in list(self._browsers):
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to close pooled browser: {e}")
+        self._browsers.clear()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
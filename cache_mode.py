@@ -0,0 +1,66 @@
+import os
+import random
+from datetime import datetime, timedelta
+from results_sink import current_run_id
+from slider_seek import SLIDER_DATE_FORMAT
+
+# warm: every user replays the scenario's own filter values, so all but the first hit the caches
+# cold: every user and iteration draws its own filter values from the scenario pools
+CACHE_MODE = os.getenv("CACHE_MODE", "warm")
+CACHE_SEED = os.getenv("CACHE_SEED")  # default: the run id, so each cold run draws new values
+CACHE_MODES = ("warm", "cold")
+
+if CACHE_MODE not in CACHE_MODES:
+    raise ValueError(f"Unknown CACHE_MODE {CACHE_MODE!r}, expected one of {CACHE_MODES}")
+
+
+def tagged_test(test_name, mode=CACHE_MODE):
+    """Result folder name of a test: cold runs get their own <test>@cold curve next to the warm one."""
+    return test_name if mode == "warm" else f"{test_name}@{mode}"
+
+
+def pool_values(spec):
+    """Values of one pool: an explicit `values` list or every day of a `date_range: [first, last]`."""
+    if "values" in spec:
+        return list(spec["values"])
+    date_format = spec.get("date_format", SLIDER_DATE_FORMAT)
+    first, last = (datetime.strptime(day, date_format) for day in spec["date_range"])
+    return [(first + timedelta(days=i)).strftime(date_format) for i in range((last - first).days + 1)]
+
+
+class ParameterPools:
+    """Distinct scenario variable values per user/iteration slot for cold-cache runs.
+
+    Each pool is shuffled with the seed. A pool with `pick: k` hands out disjoint blocks of
+    k values (e.g. four stores), any other pool one value. Slots are read as mixed-radix
+    numbers over the pools, so every slot below `combinations` gets a different set of
+    filter values, and repeats only start after that.
+    """
+
+    def __init__(self, pools, seed=None):
+        self.seed = str(seed or CACHE_SEED or current_run_id())
+        self.pools = []  # (name, shuffled values, pick, size)
+        for name in sorted(pools):
+            spec = pools[name]
+            values = pool_values(spec)
+            random.Random(f"{self.seed}/{name}").shuffle(values)
+            pick = spec.get("pick")
+            size = len(values) // pick if pick else len(values)
+            if size < 1:
+                raise ValueError(f"Pool {name!r} has {len(values)} values, fewer than pick={pick}")
+            self.pools.append((name, values, pick, size))
+
+    @property
+    def combinations(self):
+        total = 1
+        for *_, size in self.pools:
+            total *= size
+        return total
+
+    def draw(self, slot):
+        """Variable overrides for one dense user/iteration slot."""
+        overrides = {}
+        for name, values, pick, size in self.pools:
+            slot, index = divmod(slot, size)
+            overrides[name] = values[index * pick:(index + 1) * pick] if pick else values[index]
+        return overrides
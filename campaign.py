@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import subprocess
+from datetime import datetime, date, timedelta
+from pathlib import Path
+import yaml
+from results_sink import RUN_ID_FORMAT
+from browser_pool import workers_for
+
+ROOT = Path(__file__).resolve().parent
+CAMPAIGN_DIR = ROOT / "scenarios" / "campaigns"
+RUNS_DIR = ROOT / "runs"
+# Time between launching a slot's runs and their aligned start;
+# it has to cover browser start-up and the pre-flight
+CAMPAIGN_LEAD_S = int(os.getenv("CAMPAIGN_LEAD_S", "180"))
+RUN_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+LATE_TOLERANCE_S = 1  # a slot launched this much after its launch time still starts on time
+
+logger = logging.getLogger(__name__)
+
+
+def load_plan(name_or_path):
+    path = Path(name_or_path)
+    if path.suffix not in (".yaml", ".yml"):
+        path = CAMPAIGN_DIR / f"{name_or_path}.yaml"
+    with open(path, encoding="utf-8") as f:
+        plan = yaml.safe_load(f)
+    plan.setdefault("name", path.stem)
+    return plan
+
+
+def run_command(run):
+    """The command line of one plan run: a test module with `users` (or just `workers`), or a workload `mix`."""
+    if "mix" in run:
+        command = [sys.executable, "workload_mix.py", run["mix"]]
+        if "users" in run:
+            command += ["--users", str(run["users"])]
+        return command + (["--", *run["args"]] if run.get("args") else [])
+    workers = run.get("workers") or workers_for(run["users"])
+    return [sys.executable, "-m", "pytest", "-n", str(workers), run["test"], *run.get("args", [])]
+
+
+def run_env(plan, run):
+    """Environment overrides of one plan run; a test module's `users` replaces its USER_IDS with 1..users."""
+    env = {key: str(value) for key, value in {**plan.get("env", {}), **run.get("env", {})}.items()}
+    if "test" in run and "users" in run:
+        env["VIRTUAL_USERS"] = str(run["users"])
+    return env
+
+
+class Campaign:
+    """Unattended execution of a timetable of load runs, resumable after a crash.
+
+    Each slot starts all its runs in parallel, CAMPAIGN_LEAD_S before the slot time, with
+    RUN_START_AT set to the slot time so every virtual user of every run starts together.
+    A slot waits for the previous one to finish. The state of every run is checkpointed to
+    runs/campaign_<name>_<date>.json, which is also the campaign's index of the runs it made.
+    """
+
+    def __init__(self, plan, day=None, skip_missed=False, lead_s=CAMPAIGN_LEAD_S):
+        self.plan = plan
+        self.day = day or (date.fromisoformat(str(plan["date"])) if plan.get("date") else date.today())
+        self.skip_missed = skip_missed
+        self.lead_s = lead_s
+        self.campaign_id = f"{plan['name']}_{self.day:%Y_%m_%d}"
+        self.index_path = RUNS_DIR / f"campaign_{self.campaign_id}.json"
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if self.index_path.exists():
+            state = json.loads(self.index_path.read_text(encoding="utf-8"))
+            logger.info(f"♻️ Resuming campaign {self.campaign_id} from {self.index_path}")
+            return state
+        return {"campaign": self.campaign_id, "plan": self.plan, "runs": {}}
+
+    def _checkpoint(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def slot_time(self, slot):
+        hour, minute = map(int, str(slot["at"]).split(":"))
+        return datetime.combine(self.day, datetime.min.time()) + timedelta(hours=hour, minutes=minute)
+
+    def schedule(self):
+        """(key, slot time, run) of every plan run, in slot order."""
+        for s, slot in enumerate(self.plan["slots"]):
+            at = self.slot_time(slot)
+            for r, run in enumerate(slot["runs"]):
+                yield f"{s + 1}{RUN_LETTERS[r]}", at, run
+
+    def run(self):
+        for s, slot in enumerate(self.plan["slots"]):
+            at = self.slot_time(slot)
+            pending = [(f"{s + 1}{RUN_LETTERS[r]}", run) for r, run in enumerate(slot["runs"])
+                       if self.state["runs"].get(f"{s + 1}{RUN_LETTERS[r]}", {}).get("status") not in ("done", "missed")]
+            if not pending:
+                continue
+            if self.skip_missed and datetime.now() > at + timedelta(seconds=self.lead_s):
+                for key, run in pending:
+                    self.state["runs"][key] = {"status": "missed", "slot": f"{at:%H:%M}", "run": run}
+                    logger.warning(f"⏭️ {key} missed its {at:%H:%M} slot")
+                self._checkpoint()
+                continue
+            self._run_slot(at, pending)
+        failed = [key for key, entry in self.state["runs"].items() if entry["status"] == "failed"]
+        logger.info(f"🏁 Campaign {self.campaign_id} finished, index in {self.index_path}"
+                    + (f", failed: {', '.join(failed)}" if failed else ""))
+        return not failed
+
+    def _run_slot(self, at, pending):
+        launch = at - timedelta(seconds=self.lead_s)
+        wait_s = max(0, (launch - datetime.now()).total_seconds())
+        if wait_s:
+            logger.info(f"⏰ Waiting until {launch:%H:%M:%S} to launch {', '.join(key for key, _ in pending)}")
+            time.sleep(wait_s)
+        start_at = at
+        late_s = (datetime.now() - launch).total_seconds()
+        if late_s > LATE_TOLERANCE_S:
+            start_at = at + timedelta(seconds=late_s)
+            logger.warning(f"⚠️ Slot {at:%H:%M} starts late, at {start_at:%H:%M:%S}")
+        processes = []
+        for key, run in pending:
+            attempt = self.state["runs"].get(key, {}).get("attempt", 0) + 1
+            run_id = f"{at:{RUN_ID_FORMAT}}_{key}" + (f"_{attempt}" if attempt > 1 else "")
+            env = {**os.environ, **run_env(self.plan, run), "PERF_RUN_ID": run_id,
+                   "RUN_START_AT": str(start_at.timestamp())}
+            command = run_command(run)
+            log_path = RUNS_DIR / f"{run_id}.log"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            log = log_path.open("w", encoding="utf-8")
+            process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+            self.state["runs"][key] = {"status": "running", "slot": f"{at:%H:%M}", "run": run, "attempt": attempt,
+                                       "run_id": run_id, "command": command[1:], "start_at": start_at.isoformat(),
+                                       "log": str(log_path.relative_to(ROOT)),
+                                       "index": str((RUNS_DIR / f"{run_id}.json").relative_to(ROOT))}
+            processes.append((key, process, log))
+            logger.info(f"🚀 {key}: {' '.join(command[1:])} (run {run_id})")
+        self._checkpoint()
+        for key, process, log in processes:
+            returncode = process.wait()
+            log.close()
+            entry = self.state["runs"][key]
+            entry.update(status="done" if returncode == 0 else "failed", returncode=returncode,
+                         finished=datetime.now().isoformat(timespec="seconds"))
+            if returncode == 0:
+                logger.info(f"✅ {key} finished")
+            else:
+                logger.error(f"❌ {key} exited with {returncode}")
+            self._checkpoint()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    parser = argparse.ArgumentParser(description="Run a timetable of load runs unattended, resumable after a crash")
+    parser.add_argument("plan", help="name of a scenarios/campaigns/<plan>.yaml file, or a path")
+    parser.add_argument("--date", type=date.fromisoformat, help="day of the campaign (default: the plan's date, else today)")
+    parser.add_argument("--skip-missed", action="store_true",
+                        help="mark slots whose time has passed as missed instead of running them late")
+    parser.add_argument("--dry-run", action="store_true", help="print the schedule and exit")
+    args = parser.parse_args()
+
+    campaign = Campaign(load_plan(args.plan), args.date, args.skip_missed)
+    if args.dry_run:
+        for key, at, run in campaign.schedule():
+            status = campaign.state["runs"].get(key, {}).get("status", "pending")
+            users = run_env(campaign.plan, run).get("VIRTUAL_USERS")
+            print(f"{at:%Y-%m-%d %H:%M}  {key:<4} {status:<8} " + (f"VIRTUAL_USERS={users} " if users else "")
+                  + " ".join(run_command(run)[1:]))
+        sys.exit(0)
+    sys.exit(0 if campaign.run() else 1)
@@ -0,0 +1,63 @@
+import os
+import time
+from collections import deque
+from latency_stats import SCENARIO_STEP
+
+# Run-wide abort thresholds (0 disables a limit)
+BREAKER_WINDOW_S = int(os.getenv("BREAKER_WINDOW_S", "300"))
+BREAKER_MAX_ERROR_RATE = float(os.getenv("BREAKER_MAX_ERROR_RATE", "0.5"))
+BREAKER_MAX_P95_MS = float(os.getenv("BREAKER_MAX_P95_MS", "0"))
+BREAKER_MIN_SAMPLES = int(os.getenv("BREAKER_MIN_SAMPLES", "10"))
+BREAKER_STEP = os.getenv("BREAKER_STEP", SCENARIO_STEP)
+
+
+class CircuitBreaker:
+    """Rolling error rate and p95 of one step over the last window_s seconds of a run.
+
+    add() returns the reason once either limit is exceeded with at least min_samples rows
+    in the window, and keeps returning it: a tripped breaker stays open for the whole run.
+    """
+
+    def __init__(self, window_s=BREAKER_WINDOW_S, max_error_rate=BREAKER_MAX_ERROR_RATE,
+                 max_p95_ms=BREAKER_MAX_P95_MS, min_samples=BREAKER_MIN_SAMPLES, step=BREAKER_STEP):
+        self.window_s = window_s
+        self.max_error_rate = max_error_rate
+        self.max_p95_ms = max_p95_ms
+        self.min_samples = min_samples
+        self.step = step
+        self.reason = None
+        self._rows = deque()  # (arrival time, ok, duration_ms)
+
+    @property
+    def settings(self):
+        return {"window_s": self.window_s, "max_error_rate": self.max_error_rate, "max_p95_ms": self.max_p95_ms,
+                "min_samples": self.min_samples, "step": self.step}
+
+    def add(self, step, status, duration_ms, now=None):
+        if self.reason or step != self.step:
+            return self.reason
+        now = time.monotonic() if now is None else now
+        try:
+            duration_ms = float(duration_ms)
+        except (TypeError, ValueError):
+            duration_ms = None
+        self._rows.append((now, "Success" in status, duration_ms))
+        while self._rows[0][0] < now - self.window_s:
+            self._rows.popleft()
+        if len(self._rows) >= self.min_samples:
+            self.reason = self._check()
+        return self.reason
+
+    def _check(self):
+        errors = sum(1 for _, ok, _ in self._rows if not ok)
+        error_rate = errors / len(self._rows)
+        if self.max_error_rate and error_rate > self.max_error_rate:
+            return (f"error rate {error_rate:.0%} of {self.step} over the last {self.window_s} s "
+                    f"exceeds {self.max_error_rate:.0%} ({errors}/{len(self._rows)})")
+        durations = sorted(d for _, ok, d in self._rows if ok and d is not None)
+        if self.max_p95_ms and len(durations) >= self.min_samples:
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            if p95 > self.max_p95_ms:
+                return (f"p95 {p95:.0f} ms of {self.step} over the last {self.window_s} s "
+                        f"exceeds {self.max_p95_ms:.0f} ms")
+        return None
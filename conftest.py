@@ -2,27 +2,100 @@
 import pytest_asyncio
 import asyncio
 import os
+import time
 from datetime import datetime
-import csv
-import random
+from pathlib import Path
+import pytest
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from results_sink import ResultsServer, ResultsClient, current_run_id
+from item_codes import item_code_sampler
+from preflight import PREFLIGHT, preflight, module_checks, format_report
+from open_model import ARRIVAL_RATE_PER_MIN
+from distributed import run_settings
+from load_profile import START_DELAY_S, ProfileMonitor, active_profile, run_start_at
 
 # Load environment variables from .env
 load_dotenv("users.env")
 
-CSV_PATH_2    = os.getenv("ITEM_CODES_FILE", "item_codes.csv")
-SAMPLE_SIZE = int(os.getenv("SAMPLE_SIZE", "20"))
+RESULTS_ROOT = Path(__file__).resolve().parent
 
-@pytest_asyncio.fixture(scope="session")
-async def browser_context():
-    playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=False)
-    context = await browser.new_context()
-    yield context
-    await context.close()
-    await browser.close()
-    await playwright.stop()
+
+def pytest_configure(config):
+    # xdist workers inherit the controller's run id and sink address; test modules read
+    # PERF_RUN_ID at import time, so this has to happen before collection
+    if hasattr(config, "workerinput"):
+        os.environ["PERF_RUN_ID"] = config.workerinput["perf_run_id"]
+        os.environ["PERF_RESULTS_ADDRESS"] = config.workerinput["perf_results_address"]
+        return
+    if os.getenv("PERF_RESULTS_ADDRESS"):
+        # An agent of a distributed run: the controller (distributed.py) owns the sink and the run index
+        return
+    config.perf_results_server = ResultsServer(RESULTS_ROOT, current_run_id(), run_settings()).start()
+    os.environ["PERF_RESULTS_ADDRESS"] = config.perf_results_server.address
+
+
+def pytest_sessionstart(session):
+    # Runs on the controller before xdist starts its workers: a scenario with broken
+    # selectors fails here in seconds instead of every user waiting out the 120 s timeout
+    if hasattr(session.config, "workerinput"):
+        return
+    if PREFLIGHT:
+        checks = module_checks(session.config.args)
+        broken = asyncio.run(preflight(checks)) if checks else {}
+        if broken:
+            pytest.exit(f"Pre-flight failed, load run not started (PREFLIGHT=false skips the check):\n"
+                        f"{format_report(broken)}", returncode=1)
+    # The shared start of a workload mix, load profile or arrival process counts from here, after the pre-flight
+    profile = active_profile()
+    if os.getenv("WORKLOAD_MIX") or profile or ARRIVAL_RATE_PER_MIN:
+        os.environ.setdefault("RUN_START_AT", str(time.time() + START_DELAY_S))
+    if profile and hasattr(session.config, "perf_results_server"):
+        path = RESULTS_ROOT / "runs" / f"{current_run_id()}_load_profile.csv"
+        session.config.perf_profile_monitor = ProfileMonitor(profile, run_start_at(), session.config.perf_results_server,
+                                                             path).start()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["perf_run_id"] = os.environ["PERF_RUN_ID"]
+    node.workerinput["perf_results_address"] = os.environ["PERF_RESULTS_ADDRESS"]
+
+
+def pytest_sessionfinish(session, exitstatus):
+    session.config.perf_exit_status = exitstatus
+
+
+def pytest_unconfigure(config):
+    monitor = getattr(config, "perf_profile_monitor", None)
+    if monitor:
+        monitor.close()
+    server = getattr(config, "perf_results_server", None)
+    if server:
+        # Failed users still make a finished run; an interrupted or crashed session does not
+        exit_status = getattr(config, "perf_exit_status", None)
+        server.close(finished=exit_status in (pytest.ExitCode.OK, pytest.ExitCode.TESTS_FAILED))
+
+
+# Session scope == one pool per xdist worker; tests must share its event loop
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def browser_pool():
+    pool = await BrowserPool().start()
+    yield pool
+    await pool.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def results_sink():
+    client = await ResultsClient(os.environ["PERF_RESULTS_ADDRESS"]).start()
+    yield client
+    await client.close()
+
+
+@pytest_asyncio.fixture(scope="function", loop_scope="session")
+async def browser_context(browser_pool):
+    async with browser_pool.context() as context:
+        yield context
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -44,9 +117,8 @@ def timestamp():
 
 
 @pytest_asyncio.fixture(scope="function")
-def random_codes_text():
-    with open(CSV_PATH_2, newline="") as f:
-        reader = csv.reader(f)
-        all_codes = [row[0].strip() for row in reader if row]
-    selected = random.sample(all_codes, SAMPLE_SIZE)
-    return "\n".join(selected)
+def random_codes_text(request):
+    # Seeded per run and user (the user_id parameter), see item_codes.py
+    callspec = getattr(request.node, "callspec", None)
+    user_id = callspec.params.get("user_id", 0) if callspec else 0
+    return "\n".join(item_code_sampler().sample(user_id))
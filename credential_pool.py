@@ -0,0 +1,212 @@
+import os
+import re
+import json
+import time
+import uuid
+import socket
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from auth_cache import iter_accounts
+from results_sink import current_run_id
+
+ROOT = Path(__file__).resolve().parent
+# true: every virtual user leases a free account of users.env (its own PBI_USERNAME_<user id> first), so workers and
+# runs started at the same time never share one; false: always PBI_USERNAME_<user id>, nothing is locked
+CREDENTIAL_POOL = os.getenv("CREDENTIAL_POOL", "true").lower() in ("1", "true", "yes")
+# A folder shared by every run that must not double-book accounts (a network share for several hosts)
+CREDENTIAL_LEASE_DIR = Path(os.getenv("CREDENTIAL_LEASE_DIR", str(ROOT / ".leases")))
+CREDENTIAL_LEASE_S = int(os.getenv("CREDENTIAL_LEASE_S", "600"))  # the accounts of a crashed run are free after this
+CREDENTIAL_COOLDOWN_S = int(os.getenv("CREDENTIAL_COOLDOWN_S", "60"))  # rest of a released account before reuse
+CREDENTIAL_WAIT_S = int(os.getenv("CREDENTIAL_WAIT_S", "600"))  # how long a user waits for a free account
+# > 0: the run has virtual users 1..N instead of the test module's USER_IDS (needs the pool beyond the accounts' ids)
+VIRTUAL_USERS = int(os.getenv("VIRTUAL_USERS", "0"))
+LEASE_POLL_S = 5
+HOLDER = f"{socket.gethostname()}:{os.getpid()}"
+
+logger = logging.getLogger(__name__)
+_pool = None
+
+
+def get_user_credentials(user_id):
+    return os.getenv(f"PBI_USERNAME_{user_id}"), os.getenv(f"PBI_PASSWORD_{user_id}")
+
+
+class Lease:
+    """One account held by one virtual user, as long as its lease file carries this lease's token."""
+
+    def __init__(self, pool, account_id, username, password, path, record):
+        self.pool = pool
+        self.account_id = account_id
+        self.username = username
+        self.password = password
+        self.path = path
+        self.record = record
+
+    def owned(self):
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8")).get("token") == self.record["token"]
+        except (OSError, ValueError):
+            return False
+
+    def _write(self, record):
+        tmp = self.path.with_name(f"{self.path.name}.{self.record['token']}.tmp")
+        tmp.write_text(json.dumps(record), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def renew(self):
+        """Push the expiry lease_s ahead; False if the lease expired and another process took the account."""
+        if not self.owned():
+            return False
+        self.record["expires"] = time.time() + self.pool.lease_s
+        self._write(self.record)
+        return True
+
+    def release(self, cooldown_s):
+        if not self.owned():
+            logger.warning(f"⚠️ Lease of account {self.account_id} was already lost when releasing it")
+        elif cooldown_s > 0:
+            self._write({**self.record, "released": True, "expires": time.time() + cooldown_s})
+        else:
+            self.path.unlink(missing_ok=True)
+
+
+class CredentialPool:
+    """Leases the accounts of users.env to virtual users across workers, runs and, with a shared
+    lease_dir, hosts.
+
+    A lease is the file <lease_dir>/<username>.lease, created with O_EXCL so only one process
+    can hold it, and renewed while the user runs. It expires lease_s after its last renewal,
+    which frees the accounts of a crashed run; a released account keeps its file for
+    cooldown_s so the next session does not collide with the one just closed.
+    """
+
+    def __init__(self, accounts=None, lease_dir=CREDENTIAL_LEASE_DIR, lease_s=CREDENTIAL_LEASE_S,
+                 cooldown_s=CREDENTIAL_COOLDOWN_S, wait_s=CREDENTIAL_WAIT_S):
+        accounts = iter_accounts() if accounts is None else accounts
+        self.accounts = {account_id: (username, password) for account_id, username, password in accounts
+                         if username and password}
+        self.lease_dir = Path(lease_dir)
+        self.lease_s = lease_s
+        self.cooldown_s = cooldown_s
+        self.wait_s = wait_s
+
+    def path(self, username):
+        return self.lease_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', username)}.lease"
+
+    def _free(self, path):
+        """True if the lease file at path has expired or finished its cooldown."""
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))["expires"] < time.time()
+        except FileNotFoundError:
+            return True
+        except (OSError, ValueError, KeyError):
+            # Being written right now, or left half-written by a crash
+            try:
+                return path.stat().st_mtime + self.lease_s < time.time()
+            except FileNotFoundError:
+                return True
+
+    def _take_over(self, path):
+        """Move an expired lease file out of the way; False if another process got there first."""
+        stale = path.with_name(f"{path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(path, stale)
+        except OSError:
+            return False
+        if not self._free(stale):
+            # A new lease replaced the expired one between the check and the rename: put it back, but
+            # through os.link, which fails instead of overwriting a lease created at path meanwhile
+            try:
+                os.link(stale, path)
+            except OSError:
+                logger.warning(f"⚠️ Could not restore the lease {path.name} taken over by mistake")
+            stale.unlink(missing_ok=True)
+            return False
+        stale.unlink(missing_ok=True)
+        return True
+
+    def try_acquire(self, account_id, user_id):
+        """Lease account_id for user_id if it is free, else None."""
+        username, password = self.accounts[account_id]
+        path = self.path(username)
+        record = {"account": account_id, "user_id": user_id, "run_id": current_run_id(), "holder": HOLDER,
+                  "token": uuid.uuid4().hex, "expires": time.time() + self.lease_s}
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._free(path) and self._take_over(path):
+                    continue
+                return None
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            return Lease(self, account_id, username, password, path, record)
+        return None
+
+    async def acquire(self, user_id):
+        """Lease a free account for user_id, its own PBI_USERNAME_<user_id> first; None after wait_s."""
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        order = sorted(self.accounts, key=lambda account_id: (account_id != user_id, account_id))
+        deadline = time.time() + self.wait_s
+        waiting = False
+        while True:
+            for account_id in order:
+                lease = self.try_acquire(account_id, user_id)
+                if lease:
+                    logger.info(f"[User {user_id}] 🔑 Leased account {account_id}")
+                    return lease
+            if time.time() >= deadline:
+                return None
+            if not waiting:
+                logger.warning(f"[User {user_id}] ⏳ All {len(order)} accounts are leased or cooling down, waiting...")
+                waiting = True
+            await asyncio.sleep(LEASE_POLL_S)
+
+    async def _keep_alive(self, lease):
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            if not lease.renew():
+                logger.error(f"❌ Lease of account {lease.account_id} expired and was taken by another run")
+                return
+
+    @asynccontextmanager
+    async def lease(self, user_id, cooldown_s=None):
+        """(username, password) of an account leased for the block, or (None, None) if none got free."""
+        lease = await self.acquire(user_id)
+        if lease is None:
+            logger.error(f"❌ [User {user_id}] No free account in {self.lease_dir} within {self.wait_s} s")
+            yield None, None
+            return
+        keep_alive = asyncio.ensure_future(self._keep_alive(lease))
+        try:
+            yield lease.username, lease.password
+        finally:
+            keep_alive.cancel()
+            lease.release(self.cooldown_s if cooldown_s is None else cooldown_s)
+
+
+def credential_pool():
+    """The process's pool over the accounts in the environment (users.env must be loaded first)."""
+    global _pool
+    if _pool is None:
+        _pool = CredentialPool()
+        logger.info(f"🔑 Credential pool of {len(_pool.accounts)} accounts, leases in {_pool.lease_dir}")
+    return _pool
+
+
+@asynccontextmanager
+async def user_credentials(user_id, cooldown_s=None):
+    """(username, password) of a virtual user for the block: a leased account, or with
+    CREDENTIAL_POOL off the fixed PBI_USERNAME_<user_id>."""
+    if not CREDENTIAL_POOL:
+        yield get_user_credentials(user_id)
+        return
+    async with credential_pool().lease(user_id, cooldown_s) as credentials:
+        yield credentials
+
+
+def pool_settings():
+    return {"lease_dir": str(CREDENTIAL_LEASE_DIR), "lease_s": CREDENTIAL_LEASE_S,
+            "cooldown_s": CREDENTIAL_COOLDOWN_S} if CREDENTIAL_POOL else None
@@ -0,0 +1,351 @@
+import os
+import re
+import sys
+import json
+import asyncio
+import time
+import hmac
+import socket
+import ipaddress
+import logging
+import argparse
+import threading
+import subprocess
+import socketserver
+from pathlib import Path
+from results_sink import ResultsServer, current_run_id
+from item_codes import sampling_settings
+from cache_mode import CACHE_MODE, CACHE_SEED
+from think_time import THINK_TIME_DIST, THINK_TIME_SEED
+from open_model import ARRIVAL_RATE_PER_MIN, ARRIVAL_PROCESS, ARRIVAL_DURATION_S, ARRIVAL_MAX_IN_FLIGHT, ARRIVAL_SEED
+from load_profile import START_DELAY_S, ProfileMonitor, active_profile
+from credential_pool import VIRTUAL_USERS, pool_settings
+from browser_pool import workers_for
+
+ROOT = Path(__file__).resolve().parent
+AGENT_PORT = int(os.getenv("AGENT_PORT", "7010"))
+# Agents get a longer start delay than a local run, to cover sending the jobs to other hosts
+AGENT_START_DELAY_S = int(os.getenv("AGENT_START_DELAY_S", str(START_DELAY_S + 60)))
+# Settings the controller hands to every agent so all of them sample, seed and pace alike
+FORWARDED_ENV = ("ITEM_CODES_SEED", "ITEM_CODES_DISJOINT", "SAMPLE_SIZE", "CACHE_MODE", "CACHE_SEED", "THINK_TIME_",
+                 "ITERATIONS", "DURATION_S", "LOAD_PROFILE", "BREAKER_", "CREDENTIAL_",
+                 "USERS_PER_WORKER", "CONTEXTS_PER_BROWSER")
+# The only environment variables and pytest options an agent takes from a job; anything else (PYTHONPATH,
+# PYTEST_PLUGINS, -p <plugin>, ...) could make the agent run code of the sender's choosing
+JOB_ENV = FORWARDED_ENV + ("PERF_", "RUN_START_AT", "VIRTUAL_USERS", "PREFLIGHT", "PBI_USERNAME_", "PBI_PASSWORD_")
+JOB_FLAGS = ("-q", "-v", "-vv", "-s", "-x", "-rA")
+JOB_OPTIONS = ("--tb=", "--maxfail=", "--dist=")
+
+logger = logging.getLogger(__name__)
+
+
+def run_settings():
+    """What runs/<run_id>.json records about sampling, cache mode, think time, credentials and arrivals (conftest
+    and the distributed controller)."""
+    settings = {"item_codes": sampling_settings(), "cache_mode": CACHE_MODE,
+                "cache_seed": (CACHE_SEED or current_run_id()) if CACHE_MODE == "cold" else None,
+                "think_time": {"dist": THINK_TIME_DIST, "seed": THINK_TIME_SEED or current_run_id()},
+                "credential_pool": pool_settings()}
+    if ARRIVAL_RATE_PER_MIN:
+        settings["arrivals"] = {"rate_per_min": ARRIVAL_RATE_PER_MIN, "process": ARRIVAL_PROCESS,
+                                "duration_s": ARRIVAL_DURATION_S, "max_in_flight": ARRIVAL_MAX_IN_FLIGHT,
+                                "seed": ARRIVAL_SEED or current_run_id()}
+    return settings
+
+
+def parse_user_ids(spec):
+    """[1, 2, 3, 7] from "1-3,7"."""
+    user_ids = []
+    for part in str(spec).split(","):
+        first, _, last = part.strip().partition("-")
+        user_ids += range(int(first), int(last or first) + 1)
+    return user_ids
+
+
+def run_user_ids(user_ids):
+    """(all user ids of the run, this agent's share of them).
+
+    A distributed run replaces the test module's USER_IDS with PERF_USER_IDS and gives each
+    agent the PERF_USER_SLICE (start:end) of that list; results still use the whole list's
+    size and indexes, so load level, seeds and disjoint samples match a single-host run.
+    VIRTUAL_USERS=N replaces USER_IDS with 1..N; the credential pool finds them accounts.
+    """
+    if os.getenv("PERF_USER_IDS"):
+        user_ids = parse_user_ids(os.environ["PERF_USER_IDS"])
+    else:
+        user_ids = list(range(1, VIRTUAL_USERS + 1)) if VIRTUAL_USERS else list(user_ids)
+    start, _, end = os.getenv("PERF_USER_SLICE", ":").partition(":")
+    return user_ids, user_ids[int(start or 0):int(end) if end else None]
+
+
+def split_users(user_ids, weights):
+    """Contiguous (start, end) slices of user_ids in proportion to the agent weights (largest remainder)."""
+    total = sum(weights)
+    shares = [len(user_ids) * w / total for w in weights]
+    counts = [int(share) for share in shares]
+    for i in sorted(range(len(shares)), key=lambda i: shares[i] - counts[i], reverse=True)[:len(user_ids) - sum(counts)]:
+        counts[i] += 1
+    slices, start = [], 0
+    for count in counts:
+        slices.append((start, start + count))
+        start += count
+    return slices
+
+
+def parse_agent(spec):
+    """("host", port, weight) from host[:port][=weight]."""
+    address, _, weight = spec.partition("=")
+    host, _, port = address.partition(":")
+    return host, int(port or AGENT_PORT), float(weight or 1)
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def local_address_towards(host):
+    """The IP of this machine that `host` can reach it on."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.connect((host, 9))  # no packet is sent, this only picks the route
+        return s.getsockname()[0]
+
+
+# ---- Agent ------------------------------------------------------------------------------
+
+def job_test(test):
+    """The test module a job may run: a test_*.py directly under ROOT, else None."""
+    path = (ROOT / str(test)).resolve()
+    if path.parent == ROOT and path.name.startswith("test_") and path.suffix == ".py" and path.is_file():
+        return path.name
+    return None
+
+
+def job_args(args):
+    """The job's pytest options that are on the allowlist; the others are dropped with a warning."""
+    allowed = [arg for arg in args if arg in JOB_FLAGS or str(arg).startswith(JOB_OPTIONS)]
+    dropped = [arg for arg in args if arg not in allowed]
+    if dropped:
+        logger.warning(f"⚠️ Dropped pytest arguments an agent does not accept: {dropped}")
+    return allowed
+
+
+def job_env(env):
+    """The job's environment variables that are on the allowlist; the others are dropped with a warning."""
+    allowed = {key: str(value) for key, value in env.items() if key.startswith(JOB_ENV)}
+    dropped = sorted(set(env) - set(allowed))
+    if dropped:
+        logger.warning(f"⚠️ Dropped environment variables an agent does not accept: {dropped}")
+    return allowed
+
+
+def serve_agent(host="127.0.0.1", port=AGENT_PORT, token=None):
+    """Run jobs from a distributed controller, one at a time, as local pytest runs.
+
+    A job is one JSON line: {"name", "token", "test", "workers", "args", "env", "start_in_s"}.
+    The agent only runs jobs carrying its own AGENT_TOKEN, only a test_*.py of this folder and
+    only the allowlisted options and environment variables (JOB_FLAGS/JOB_OPTIONS, JOB_ENV).
+    It answers {"status": "started"} and, when pytest exits, {"status": "finished",
+    "returncode"}; a refused job gets {"status": "denied", "reason"}. If the controller
+    disconnects first the pytest run is terminated.
+    """
+    token = token or os.getenv("AGENT_TOKEN")
+    if not token:
+        raise SystemExit("❌ AGENT_TOKEN is not set: the agent only runs jobs from controllers that know the token")
+    busy = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, **message):
+            self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+        def handle(self):
+            try:
+                job = json.loads(self.rfile.readline())
+            except ValueError:
+                return
+            if not isinstance(job, dict):
+                return
+            if not hmac.compare_digest(str(job.get("token", "")).encode("utf-8"), token.encode("utf-8")):
+                logger.warning(f"⚠️ Refused a job from {self.client_address[0]}: wrong token")
+                self.reply(status="denied", reason="wrong token")
+                return
+            test = job_test(job.get("test", ""))
+            if test is None:
+                logger.warning(f"⚠️ Refused a job from {self.client_address[0]}: {job.get('test')!r} is not a test module")
+                self.reply(status="denied", reason="not a test_*.py of the agent's folder")
+                return
+            try:
+                env = job_env(job.get("env", {}))
+                env["PERF_RUN_ID"] = re.sub(r"[^A-Za-z0-9_.-]", "_", env.get("PERF_RUN_ID") or "run")
+                job = {**job, "name": re.sub(r"[^A-Za-z0-9_.-]", "_", str(job.get("name", "job"))), "test": test,
+                       "workers": int(job["workers"]), "start_in_s": float(job["start_in_s"]),
+                       "args": job_args(job.get("args", [])), "env": env}
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                self.reply(status="denied", reason=f"malformed job: {e}")
+                return
+            if not busy.acquire(blocking=False):
+                self.reply(status="busy")
+                return
+            try:
+                self.run(job)
+            finally:
+                busy.release()
+
+        def run(self, job):
+            env = {**os.environ, **job["env"], "RUN_START_AT": str(time.time() + job["start_in_s"])}
+            log_path = ROOT / "runs" / f"{job['env']['PERF_RUN_ID']}_agent_{job['name']}.log"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            command = [sys.executable, "-m", "pytest", "-n", str(job["workers"]), job["test"], *job.get("args", [])]
+            with log_path.open("w", encoding="utf-8") as log:
+                process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+                logger.info(f"🚀 Job {job['name']}: {' '.join(command[1:])} for users "
+                            f"{job['env'].get('PERF_USER_SLICE', 'all')} of run {job['env']['PERF_RUN_ID']}, log {log_path}")
+                self.reply(status="started", pid=process.pid)
+                threading.Thread(target=self.watch_controller, args=(process,), daemon=True).start()
+                returncode = process.wait()
+            logger.info(f"🏁 Job {job['name']} exited with {returncode}")
+            self.reply(status="finished", returncode=returncode)
+
+        def watch_controller(self, process):
+            if not self.rfile.readline() and process.poll() is None:
+                logger.warning("⚠️ Controller disconnected, terminating the job")
+                process.terminate()
+
+    with socketserver.ThreadingTCPServer((host, port), Handler) as server:
+        logger.info(f"🛰️ Agent listening on {host}:{port}")
+        server.serve_forever()
+
+
+# ---- Controller -------------------------------------------------------------------------
+
+def forwarded_env(user_ids):
+    env = {key: value for key, value in os.environ.items() if key.startswith(FORWARDED_ENV)}
+    for user_id in user_ids:
+        for key in (f"PBI_USERNAME_{user_id}", f"PBI_PASSWORD_{user_id}"):
+            if os.getenv(key):
+                env[key] = os.environ[key]
+    return env
+
+
+def preflight_once(test):
+    """The controller's pre-flight of the test, so agents skip theirs (PREFLIGHT=false); False if a step is broken."""
+    from preflight import PREFLIGHT, preflight, module_checks, format_report
+    if not PREFLIGHT:
+        return True
+    broken = asyncio.run(preflight(module_checks([ROOT / test])))
+    if broken:
+        logger.error(f"❌ Pre-flight failed, no job sent to the agents (PREFLIGHT=false skips the check):\n"
+                     f"{format_report(broken)}")
+    return not broken
+
+
+def run_distributed(test, agents, user_ids, start_delay_s=AGENT_START_DELAY_S, bind="127.0.0.1", sink_port=0, args=()):
+    """Split user_ids over the agents, run the test on all of them against one results sink; True if all succeed.
+
+    The run id, settings and seeds are the controller's, every agent starts its users the same
+    start_delay_s after receiving its job, and the sink writes one merged set of results,
+    histograms and runs/<run_id>.json as for a single-host run. The pre-flight runs once,
+    here, before any job is sent. The sink listens on bind only, so agents on other hosts
+    need bind set to an interface they can reach.
+    """
+    token = os.getenv("AGENT_TOKEN")
+    if not token:
+        logger.error("❌ AGENT_TOKEN is not set: agents refuse jobs without their token")
+        return False
+    remote = [host for host, _, _ in agents if not is_loopback(host)]
+    if is_loopback(bind) and remote:
+        logger.error(f"❌ The results sink listens on {bind}, which {', '.join(remote)} cannot reach: "
+                     f"pass --bind with this machine's address (or 0.0.0.0)")
+        return False
+    if job_test(test) is None:
+        logger.error(f"❌ {test} is not a test_*.py of {ROOT}, agents only run those")
+        return False
+    test, args = job_test(test), job_args(args)
+    run_id = current_run_id()
+    os.environ["PERF_USER_IDS"] = ",".join(map(str, user_ids))  # the pre-flight runs as the run's first user
+    if not preflight_once(test):
+        return False
+    server = ResultsServer(ROOT, run_id, run_settings(), host=bind, port=sink_port).start()
+    _, port = server.address.rsplit(":", 1)
+    profile = active_profile()
+    monitor = None
+    if profile:
+        monitor = ProfileMonitor(profile, time.time() + start_delay_s, server,
+                                 ROOT / "runs" / f"{run_id}_load_profile.csv").start()
+    slices = split_users(user_ids, [weight for _, _, weight in agents])
+    results = {}
+
+    def drive(name, host, agent_port, start, end):
+        sink_host = local_address_towards(host) if bind in ("0.0.0.0", "") else bind
+        job = {"name": name, "token": token, "test": test, "workers": workers_for(end - start), "args": args,
+               "start_in_s": start_delay_s,
+               "env": {**forwarded_env(user_ids[start:end]), "PERF_RUN_ID": run_id,
+                       "PERF_RESULTS_ADDRESS": f"{sink_host}:{port}",
+                       "PERF_USER_IDS": ",".join(map(str, user_ids)), "PERF_USER_SLICE": f"{start}:{end}",
+                       "PREFLIGHT": "false"}}
+        try:
+            with socket.create_connection((host, agent_port)) as conn, conn.makefile("rwb") as stream:
+                stream.write((json.dumps(job, ensure_ascii=False) + "\n").encode("utf-8"))
+                stream.flush()
+                for line in stream:
+                    message = json.loads(line)
+                    logger.info(f"🛰️ {name}: {message}")
+                    if message["status"] in ("finished", "busy", "denied"):
+                        results[name] = message.get("returncode", message["status"])
+                        return
+        except OSError as e:
+            logger.error(f"❌ Agent {name} failed: {e}")
+        results.setdefault(name, "unreachable")
+
+    threads = []
+    for (host, agent_port, _), (start, end) in zip(agents, slices):
+        if start == end:
+            continue
+        name = f"{host}_{agent_port}"
+        logger.info(f"📤 {name}: users {user_ids[start]}..{user_ids[end - 1]} ({end - start})")
+        thread = threading.Thread(target=drive, args=(name, host, agent_port, start, end))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    if monitor:
+        monitor.close()
+    # Like a local run, failed users (pytest exit code 1) still make a finished run
+    server.close(finished=all(returncode in (0, 1) for returncode in results.values()))
+    logger.info(f"📊 Agents finished: {results}")
+    return all(returncode == 0 for returncode in results.values())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    parser = argparse.ArgumentParser(description="Spread one run's virtual users over several agent processes or hosts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    agent = commands.add_parser("agent", help="run jobs from a controller")
+    agent.add_argument("--host", default="127.0.0.1", help="interface to listen on, e.g. 0.0.0.0 for other hosts")
+    agent.add_argument("--port", type=int, default=AGENT_PORT)
+    run = commands.add_parser("run", help="run a test module on several agents as one run")
+    run.add_argument("test", help="test module, e.g. test_item_sales_FAB_PROD.py")
+    run.add_argument("--agents", required=True, help="comma-separated host[:port][=weight], e.g. pc1=2,pc2,127.0.0.1:7011")
+    run.add_argument("--users", required=True, help="user ids of the run, e.g. 1-300")
+    run.add_argument("--start-delay", type=int, default=AGENT_START_DELAY_S,
+                     help="seconds from sending the jobs to the users' shared start")
+    run.add_argument("--bind", default="127.0.0.1",
+                     help="interface of the results sink; agents on other hosts need one they can reach, e.g. 0.0.0.0")
+    run.add_argument("--sink-port", type=int, default=0, help="port of the results sink (default: any free port)")
+    # Everything after -- goes to pytest, as far as the agents' allowlist (JOB_FLAGS, JOB_OPTIONS) accepts it
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args, extra = parser.parse_args(argv[:split]), argv[split + 1:]
+
+    from dotenv import load_dotenv
+    load_dotenv("users.env")
+    if args.command == "agent":
+        serve_agent(args.host, args.port)
+    else:
+        ok = run_distributed(args.test, [parse_agent(spec) for spec in args.agents.split(",")],
+                             parse_user_ids(args.users), args.start_delay, args.bind, args.sink_port,
+                             extra)
+        sys.exit(0 if ok else 1)
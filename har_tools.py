@@ -0,0 +1,146 @@
+import io
+import os
+import re
+import csv
+import sys
+import json
+import zipfile
+import argparse
+from datetime import datetime
+from pathlib import Path
+from network_probe import classify_url
+
+HAR_CAPTURE = os.getenv("HAR_CAPTURE", "full")  # off | minimal | full
+HAR_CONTENT = os.getenv("HAR_CONTENT", "omit")  # omit | attach | embed
+HAR_COMPRESS = os.getenv("HAR_COMPRESS", "true").lower() in ("1", "true", "yes")
+
+CHUNK_SIZE = 1 << 20
+ENTRIES_START = re.compile(r'"entries"\s*:\s*\[')
+TIMING_PHASES = ("blocked", "dns", "connect", "ssl", "send", "wait", "receive")
+TABLE_HEADER = ["started", "offset_ms", "method", "status", "url_class", "url", *TIMING_PHASES, "total_ms", "response_bytes"]
+
+
+def har_options(output_dir, run_ts, user_id, session=None):
+    """new_context() keyword arguments for one HAR per user and run, or per arrival session of
+    an open-model run (empty when capture is off)."""
+    if HAR_CAPTURE == "off":
+        return {}
+    har_dir = Path(output_dir) / "har"
+    har_dir.mkdir(parents=True, exist_ok=True)
+    suffix = ".har.zip" if HAR_COMPRESS else ".har"
+    name = f"perf_{run_ts}_user{user_id}" + (f"_session{session}" if session is not None else "")
+    return {
+        "record_har_path": str(har_dir / f"{name}{suffix}"),
+        "record_har_mode": HAR_CAPTURE,
+        "record_har_content": HAR_CONTENT,
+    }
+
+
+def _open_text(path):
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        member = next(name for name in archive.namelist() if name.endswith(".har"))
+        return io.TextIOWrapper(archive.open(member), encoding="utf-8-sig")
+    return open(path, encoding="utf-8-sig")
+
+
+def iter_har_entries(path):
+    """Yield the HAR's log.entries one at a time, reading the file in chunks.
+
+    Only the entry being decoded is held in memory, so multi-GB HARs from long soak runs
+    can be analyzed on the load-generator box. Compressed (.zip) HARs are read in place.
+    """
+    decoder = json.JSONDecoder()
+    with _open_text(path) as f:
+        buf = ""
+        pos = None
+        eof = False
+        while True:
+            if pos is None:
+                match = ENTRIES_START.search(buf)
+                if match:
+                    buf, pos = buf[match.end():], 0
+                    continue
+                buf = buf[-32:]  # keep enough to match a key split across chunks
+            else:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buf) and buf[pos] == "]":
+                    return
+                if pos < len(buf):
+                    try:
+                        entry, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                    else:
+                        yield entry
+                        buf, pos = buf[end:], 0
+                        continue
+                buf, pos = buf[pos:], 0
+            if eof:
+                raise ValueError(f"{path} ended before log.entries was closed")
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buf += chunk
+
+
+def entry_row(entry, t0=None):
+    request, response, timings = entry["request"], entry.get("response", {}), entry.get("timings", {})
+    started = datetime.fromisoformat(entry["startedDateTime"].replace("Z", "+00:00"))
+    offset_ms = round((started - t0).total_seconds() * 1000, 1) if t0 else 0.0
+    phases = [round(timings.get(phase, -1), 1) for phase in TIMING_PHASES]
+    return [
+        entry["startedDateTime"], offset_ms, request.get("method", ""), response.get("status", ""),
+        classify_url(request.get("url", "")) or "", request.get("url", ""), *phases,
+        round(entry.get("time", 0), 1), response.get("bodySize", -1),
+    ]
+
+
+def waterfall_line(row, scale_ms=100, width=120):
+    """One text waterfall bar: '.' before the request started, '#' while it ran."""
+    offset_ms, total_ms = row[1], row[-2]
+    lead = min(width, max(0, int(offset_ms // scale_ms)))
+    bar = max(1, int(total_ms // scale_ms))
+    label = f"{row[3]!s:>3} {row[2]:<4} {row[4] or '-':<20} {total_ms:>9.1f} ms"
+    return f"{label} |{'.' * lead}{'#' * max(1, min(bar, width - lead))}"
+
+
+def analyze(path, table_path=None, waterfall_path=None, queries_only=False, scale_ms=100):
+    """Stream a HAR into a per-request timing table (CSV) and a text waterfall."""
+    table_file = open(table_path, "w", newline="", encoding="utf-8") if table_path else None
+    waterfall_file = open(waterfall_path, "w", encoding="utf-8") if waterfall_path else sys.stdout
+    try:
+        writer = csv.writer(table_file) if table_file else None
+        if writer:
+            writer.writerow(TABLE_HEADER)
+        t0 = None
+        count = 0
+        for entry in iter_har_entries(path):
+            if t0 is None:
+                t0 = datetime.fromisoformat(entry["startedDateTime"].replace("Z", "+00:00"))
+            row = entry_row(entry, t0)
+            if queries_only and not row[4]:
+                continue
+            if writer:
+                writer.writerow(row)
+            waterfall_file.write(waterfall_line(row, scale_ms) + "\n")
+            count += 1
+        return count
+    finally:
+        if table_file:
+            table_file.close()
+        if waterfall_path:
+            waterfall_file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request timing table and waterfall from a (zipped) HAR file")
+    parser.add_argument("har")
+    parser.add_argument("--table", help="write the per-request timing table to this CSV")
+    parser.add_argument("--waterfall", help="write the waterfall here instead of stdout")
+    parser.add_argument("--queries-only", action="store_true", help="only Power BI backend queries")
+    parser.add_argument("--scale-ms", type=float, default=100, help="milliseconds per waterfall character")
+    args = parser.parse_args()
+    n = analyze(args.har, args.table, args.waterfall, args.queries_only, args.scale_ms)
+    print(f"📄 {n} requests analyzed from {args.har}", file=sys.stderr)
@@ -0,0 +1,103 @@
+import os
+import csv
+import random
+import logging
+from array import array
+from results_sink import current_run_id
+from cache_mode import CACHE_MODE
+
+# The list of item codes and how many of them one sample takes
+ITEM_CODES_FILE = os.getenv("ITEM_CODES_FILE", "item_codes.csv")
+SAMPLE_SIZE = int(os.getenv("SAMPLE_SIZE", "20"))
+ITEM_CODES_SEED = os.getenv("ITEM_CODES_SEED")  # default: the run id, new codes every run but reproducible
+# true: no two virtual users or iterations of a run ever get the same code (always so in a cold-cache run)
+ITEM_CODES_DISJOINT = os.getenv("ITEM_CODES_DISJOINT", "false").lower() in ("1", "true", "yes") or CACHE_MODE == "cold"
+
+logger = logging.getLogger(__name__)
+_samplers = {}
+
+
+class ItemCodes:
+    """Read-only code list; equal-width numeric codes are packed into an unsigned int array."""
+
+    def __init__(self, codes):
+        widths = {len(code) for code in codes}
+        if len(widths) == 1 and all(code.isdigit() for code in codes) and widths.pop() <= 9:
+            self._width = len(codes[0])
+            self._codes = array("I", map(int, codes))
+        else:
+            self._width = None
+            self._codes = tuple(codes)
+
+    @classmethod
+    def load(cls, path):
+        """First column of every non-empty row (a UTF-8 BOM is ignored)."""
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            codes = [row[0].strip() for row in csv.reader(f) if row and row[0].strip()]
+        if not codes:
+            raise ValueError(f"No item codes found in {path}")
+        return cls(codes)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __getitem__(self, index):
+        code = self._codes[index]
+        return str(code).zfill(self._width) if self._width else code
+
+
+class ItemCodeSampler:
+    """Seeded item-code samples per virtual user and iteration.
+
+    The same seed, user and iteration always give the same codes. With disjoint=True every
+    slot (a dense user/iteration number chosen by the caller) takes the next block of one
+    seeded permutation of the list, so no code repeats within a run until the list runs out;
+    later slots wrap around to the first blocks, with a warning.
+    """
+
+    def __init__(self, codes, seed=None, sample_size=SAMPLE_SIZE, disjoint=ITEM_CODES_DISJOINT):
+        if sample_size > len(codes):
+            raise ValueError(f"Cannot sample {sample_size} codes from a list of {len(codes)}")
+        self.codes = codes
+        self.seed = str(seed or ITEM_CODES_SEED or current_run_id())
+        self.sample_size = sample_size
+        self.disjoint = disjoint
+        self._permutation = None
+        self._wrapped = False
+
+    @property
+    def disjoint_slots(self):
+        return len(self.codes) // self.sample_size
+
+    def sample(self, user_id, iteration=0, slot=None):
+        if not self.disjoint:
+            rng = random.Random(f"{self.seed}/{user_id}/{iteration}")
+            return [self.codes[i] for i in rng.sample(range(len(self.codes)), self.sample_size)]
+        slot = user_id if slot is None else slot
+        if slot >= self.disjoint_slots:
+            # Repeat samples rather than fail every later user's fill step mid-run (as ParameterPools does)
+            if not self._wrapped:
+                logger.warning(f"⚠️ {len(self.codes)} codes only make {self.disjoint_slots} disjoint samples of "
+                               f"{self.sample_size}; slot {slot} and later repeat earlier codes "
+                               f"(add codes or lower SAMPLE_SIZE)")
+                self._wrapped = True
+            slot %= self.disjoint_slots
+        if self._permutation is None:
+            self._permutation = array("I", range(len(self.codes)))
+            random.Random(self.seed).shuffle(self._permutation)
+        start = slot * self.sample_size
+        return [self.codes[i] for i in self._permutation[start:start + self.sample_size]]
+
+
+def sampling_settings(path=ITEM_CODES_FILE):
+    """What the run's results index records so every sample of the run can be reproduced."""
+    return {"file": str(path), "seed": ITEM_CODES_SEED or current_run_id(), "sample_size": SAMPLE_SIZE,
+            "disjoint": ITEM_CODES_DISJOINT}
+
+
+def item_code_sampler(path=ITEM_CODES_FILE):
+    """The worker's sampler for path; the file is read once per process."""
+    if path not in _samplers:
+        _samplers[path] = ItemCodeSampler(ItemCodes.load(path))
+        logger.info(f"🔢 Loaded {len(_samplers[path].codes)} item codes from {path}, seed {_samplers[path].seed}")
+    return _samplers[path]
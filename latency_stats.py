@@ -0,0 +1,281 @@
+import sys
+import csv
+import json
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PERCENTILES = (50, 90, 95, 99)
+SUMMARY_HEADER = ["test", "number_of_users", "step", "count", "errors", "error_rate",
+                  *(f"p{p}_ms" for p in PERCENTILES), "max_ms", "mean_ms", "throughput_per_s"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+SCENARIO_STEP = "scenario"
+# Idle gaps up to this long (think time, setup) still count as one window of activity
+WINDOW_GAP_S = 300
+LEGACY_COLUMNS = ["timestamp", "user_id", "status", "duration_ms", "step", "think_ms"]
+
+
+class LatencyHistogram:
+    """High-dynamic-range latency histogram with exact merges.
+
+    Values are kept in whole microseconds. Below 2**sub_bucket_bits µs every value has its
+    own bucket; above that each power-of-two range is split into 2**(sub_bucket_bits - 1)
+    linear buckets, so any recorded value is reported within 2 / 2**sub_bucket_bits of its
+    true value (0.8% with the default 8 bits) from 1 µs up to hours. Buckets are a sparse
+    dict of counts, so merging worker or run histograms is plain addition and loses nothing.
+    """
+
+    def __init__(self, sub_bucket_bits=8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.counts = {}
+        self.total = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = None
+
+    def _index(self, us):
+        if us < self.sub_bucket_count:
+            return us
+        shift = us.bit_length() - self.sub_bucket_bits
+        half = self.sub_bucket_count >> 1
+        return self.sub_bucket_count + (shift - 1) * half + ((us >> shift) - half)
+
+    def _highest_equivalent(self, index):
+        if index < self.sub_bucket_count:
+            return index
+        half = self.sub_bucket_count >> 1
+        shift, offset = divmod(index - self.sub_bucket_count, half)
+        shift += 1
+        return ((offset + half + 1) << shift) - 1
+
+    def record(self, value_ms, count=1):
+        us = max(0, round(value_ms * 1000))
+        index = self._index(us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum_us += us * count
+        self.min_us = us if self.min_us is None else min(self.min_us, us)
+        self.max_us = us if self.max_us is None else max(self.max_us, us)
+
+    def merge(self, other):
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        if other.total:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+            self.max_us = other.max_us if self.max_us is None else max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, p):
+        """Value (ms) at or below which p percent of the recordings fall."""
+        if not self.total:
+            return None
+        rank = max(1, -(-self.total * p // 100))  # ceil without floats
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def buckets(self):
+        """(value_ms, count) per non-empty bucket in value order, e.g. to resample the distribution."""
+        for index in sorted(self.counts):
+            yield min(self._highest_equivalent(index), self.max_us) / 1000, self.counts[index]
+
+    @property
+    def max_ms(self):
+        return self.max_us / 1000 if self.total else None
+
+    @property
+    def mean_ms(self):
+        return self.sum_us / self.total / 1000 if self.total else None
+
+    def to_dict(self):
+        return {"sub_bucket_bits": self.sub_bucket_bits, "total": self.total, "sum_us": self.sum_us,
+                "min_us": self.min_us, "max_us": self.max_us, "counts": {str(i): c for i, c in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["sub_bucket_bits"])
+        hist.counts = {int(i): c for i, c in data["counts"].items()}
+        hist.total, hist.sum_us = data["total"], data["sum_us"]
+        hist.min_us, hist.max_us = data["min_us"], data["max_us"]
+        return hist
+
+
+class StepStats:
+    """Latency histogram, error count and active time windows for one (test, users, step).
+
+    Windows are the union of [start, start + duration] of every row, with gaps shorter than
+    WINDOW_GAP_S closed, so a folder holding several runs days apart still reports the
+    throughput achieved while under load rather than over the calendar span.
+    """
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.windows = []  # sorted, disjoint [start, end] pairs
+
+    @property
+    def count(self):
+        return self.histogram.total + self.errors
+
+    def add(self, timestamp, status, duration_ms):
+        duration_ms = _to_float(duration_ms)
+        start = datetime.strptime(timestamp, TIMESTAMP_FORMAT) if timestamp else None
+        if "Success" in status and duration_ms is not None:
+            self.histogram.record(duration_ms)
+            end = start + timedelta(milliseconds=duration_ms) if start else None
+        else:
+            self.errors += 1
+            end = start
+        if start:
+            self._add_window(start, end)
+
+    def _add_window(self, start, end):
+        gap = timedelta(seconds=WINDOW_GAP_S)
+        merged = []
+        for window in self.windows:
+            if window[1] + gap < start or end + gap < window[0]:
+                merged.append(window)
+            else:
+                start, end = min(start, window[0]), max(end, window[1])
+        merged.append([start, end])
+        self.windows = sorted(merged)
+
+    @property
+    def active_seconds(self):
+        return sum((end - start).total_seconds() for start, end in self.windows)
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.errors += other.errors
+        for start, end in other.windows:
+            self._add_window(start, end)
+        return self
+
+    def summary(self):
+        window_s = self.active_seconds
+        hist = self.histogram
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else None,
+            **{f"p{p}_ms": hist.percentile(p) for p in PERCENTILES},
+            "max_ms": hist.max_ms,
+            "mean_ms": round(hist.mean_ms, 1) if hist.total else None,
+            "throughput_per_s": round(hist.total / window_s, 4) if window_s > 0 else None,
+        }
+
+    def to_dict(self):
+        return {"histogram": self.histogram.to_dict(), "errors": self.errors,
+                "windows": [[start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT + ".%f")]
+                            for start, end in self.windows]}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.errors = data["errors"]
+        stats.windows = [[datetime.strptime(start, TIMESTAMP_FORMAT), datetime.strptime(end, TIMESTAMP_FORMAT + ".%f")]
+                         for start, end in data["windows"]]
+        return stats
+
+
+class SummaryBuilder:
+    """Streaming per-(test, number_of_users, step) statistics; builders merge exactly."""
+
+    def __init__(self):
+        self.groups = {}
+
+    def add(self, test, number_of_users, step, timestamp, status, duration_ms):
+        key = (test, int(number_of_users), step or SCENARIO_STEP)
+        self.groups.setdefault(key, StepStats()).add(timestamp, status, duration_ms)
+
+    def add_file(self, path, test, number_of_users):
+        """Stream one performance_logs*.csv of any generation into the builder, row by row."""
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            columns = LEGACY_COLUMNS
+            for i, row in enumerate(reader):
+                if i == 0 and row and row[0] == "timestamp":
+                    columns = [c.replace("load_time_ms", "duration_ms") for c in row]
+                    continue
+                record = dict(zip(columns, row))
+                if not record.get("timestamp") or not record.get("user_id"):
+                    continue
+                self.add(test, number_of_users, record.get("step"), record["timestamp"],
+                         record.get("status", ""), record.get("duration_ms"))
+
+    def merge(self, other):
+        for key, stats in other.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(stats)
+            else:
+                self.groups[key] = StepStats().merge(stats)
+        return self
+
+    def rows(self):
+        for (test, number_of_users, step), stats in sorted(self.groups.items()):
+            summary = stats.summary()
+            yield [test, number_of_users, step, *(summary[c] for c in SUMMARY_HEADER[3:])]
+
+    def to_dict(self):
+        return [{"test": t, "number_of_users": n, "step": s, "stats": stats.to_dict()}
+                for (t, n, s), stats in sorted(self.groups.items())]
+
+    @classmethod
+    def from_dict(cls, data):
+        builder = cls()
+        for item in data:
+            builder.groups[(item["test"], item["number_of_users"], item["step"])] = StepStats.from_dict(item["stats"])
+        return builder
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize_tree(root):
+    """SummaryBuilder over every <test>/number_of_users=N/performance_logs*.csv under root."""
+    builder = SummaryBuilder()
+    for test_dir in sorted(p for p in Path(root).iterdir() if p.is_dir() and not p.name.startswith(".")):
+        for users_dir in sorted(test_dir.glob("number_of_users=*")):
+            number_of_users = users_dir.name.split("=", 1)[1]
+            for path in sorted(users_dir.glob("performance_logs*.csv")):
+                builder.add_file(path, test_dir.name, number_of_users)
+    return builder
+
+
+def write_summary(builder, file):
+    writer = csv.writer(file)
+    writer.writerow(SUMMARY_HEADER)
+    writer.writerows(builder.rows())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency percentiles, error rate and throughput per test, user count and step")
+    parser.add_argument("root", nargs="?", default=Path(__file__).resolve().parent)
+    parser.add_argument("--histograms", nargs="*", default=[],
+                        help="merge these runs/<run id>_histograms.json files instead of scanning the CSV logs")
+    parser.add_argument("--output", help="write the summary CSV here instead of stdout")
+    args = parser.parse_args()
+    if args.histograms:
+        summary = SummaryBuilder()
+        for path in args.histograms:
+            summary.merge(SummaryBuilder.from_dict(json.loads(Path(path).read_text(encoding="utf-8"))))
+    else:
+        summary = summarize_tree(args.root)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            write_summary(summary, f)
+    else:
+        write_summary(summary, sys.stdout)
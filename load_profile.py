@@ -0,0 +1,148 @@
+import os
+import re
+import csv
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+import yaml
+
+PROFILE_DIR = Path(__file__).resolve().parent / "scenarios" / "profiles"
+LOAD_PROFILE = os.getenv("LOAD_PROFILE")  # scenarios/profiles/<name>.yaml; unset: every user starts at once
+# Time between launching pytest and the shared start (profile t=0, mix start), enough for every worker to open its browser
+START_DELAY_S = int(os.getenv("START_DELAY_S", "60"))
+# How often the controller logs the intended and the achieved number of active users
+PROFILE_LOG_S = int(os.getenv("PROFILE_LOG_S", "30"))
+PROFILE_COLUMNS = ["timestamp", "elapsed_s", "intended_users", "active_users"]
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(h|m|s)?")
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, None: 1}
+
+logger = logging.getLogger(__name__)
+
+
+def parse_duration(value):
+    """Seconds of 90, "90s", "10m" or "1.5h"."""
+    match = DURATION_PATTERN.fullmatch(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid stage duration {value!r}, expected e.g. 30s, 10m or 1h")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def run_start_at():
+    """The run's shared start (epoch seconds) that conftest sets after the pre-flight, or None."""
+    return float(os.getenv("RUN_START_AT") or 0) or None
+
+
+class LoadProfile:
+    """Staged number of active virtual users over the run, starting from 0 users at t=0.
+
+    Each stage moves linearly from the previous target to its own `target` over its
+    `duration`, so +5 users/min up to 50 is {duration: 10m, target: 50} and a plateau
+    repeats the target. The n-th user (0-based release order) is active while the target
+    is above n: it starts once the ramp reaches n + 1 and stops starting new iterations
+    once a ramp-down falls below n + 1 (one window per user).
+    """
+
+    def __init__(self, stages, name=None):
+        self.name = name
+        self.stages = [(parse_duration(stage["duration"]), int(stage["target"])) for stage in stages]
+        if not self.stages:
+            raise ValueError("A load profile needs at least one stage")
+
+    @classmethod
+    def load(cls, name, profile_dir=PROFILE_DIR):
+        with open(Path(profile_dir) / f"{name}.yaml", encoding="utf-8") as f:
+            return cls(yaml.safe_load(f)["stages"], name)
+
+    @property
+    def duration_s(self):
+        return sum(duration for duration, _ in self.stages)
+
+    @property
+    def peak(self):
+        return max(target for _, target in self.stages)
+
+    def target_at(self, elapsed_s):
+        """Intended number of active users elapsed_s after the start."""
+        t0, previous = 0, 0
+        for duration, target in self.stages:
+            if elapsed_s < t0 + duration:
+                return int(previous + (target - previous) * (elapsed_s - t0) / duration)
+            t0, previous = t0 + duration, target
+        return 0
+
+    def window(self, index):
+        """(start, stop) offsets in seconds of the index-th user, or None if the profile never needs it."""
+        level = index + 1
+        start = None
+        t0, previous = 0, 0
+        for duration, target in self.stages:
+            if start is None and previous < level <= target:
+                start = t0 + duration * (level - previous) / (target - previous)
+            elif start is not None and previous >= level > target:
+                return start, t0 + duration * (previous - level) / (previous - target)
+            t0, previous = t0 + duration, target
+        return None if start is None else (start, t0)
+
+
+def active_profile():
+    return LoadProfile.load(LOAD_PROFILE) if LOAD_PROFILE else None
+
+
+def release_window(index, profile=None, start_at=None):
+    """(start_at, stop_at) epoch seconds of the index-th user of a test under the run's load profile.
+
+    Without a profile every user starts at the shared start time (if any) and runs its
+    iterations; a user the profile never needs gets None.
+    """
+    profile = profile or active_profile()
+    start_at = start_at or run_start_at()
+    if not profile:
+        return start_at, None
+    window = profile.window(index)
+    if window is None:
+        return None
+    base = start_at or time.time()
+    return base + window[0], base + window[1]
+
+
+class ProfileMonitor:
+    """Controller-side log of intended vs. achieved active users, one row every interval_s.
+
+    The rows also go to runs/<run_id>_load_profile.csv so latencies can be matched to the
+    load level they were measured at.
+    """
+
+    def __init__(self, profile, start_at, sink, path, interval_s=PROFILE_LOG_S):
+        self.profile = profile
+        self.start_at = start_at
+        self.sink = sink
+        self.path = Path(path)
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-profile", daemon=True)
+
+    def start(self):
+        logger.info(f"📶 Load profile {self.profile.name}: {self.profile.duration_s / 60:.0f} min, "
+                    f"peak {self.profile.peak} users")
+        self._thread.start()
+        return self
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(PROFILE_COLUMNS)
+            while not self._stop.wait(self.interval_s):
+                elapsed_s = time.time() - self.start_at
+                if elapsed_s < 0:
+                    continue
+                intended, active = self.profile.target_at(elapsed_s), self.sink.active_users
+                writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), round(elapsed_s), intended, active])
+                f.flush()
+                logger.info(f"📶 {elapsed_s / 60:.1f} min: {intended} users intended, {active} active")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,86 @@
+import re
+import time
+import logging
+from datetime import datetime
+
+# Backend calls that carry report load on the capacity, classified by URL
+QUERY_URL_CLASSES = [
+    ("querydata", re.compile(r"/querydata", re.IGNORECASE)),
+    ("executeQueries", re.compile(r"/executeQueries", re.IGNORECASE)),
+    ("conceptualschema", re.compile(r"/conceptualschema", re.IGNORECASE)),
+    ("modelsAndExploration", re.compile(r"/modelsAndExploration", re.IGNORECASE)),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def classify_url(url):
+    for url_class, pattern in QUERY_URL_CLASSES:
+        if pattern.search(url):
+            return url_class
+    return None
+
+
+def _ms(value):
+    return round(value, 1) if value is not None and value >= 0 else "N/A"
+
+
+class NetworkProbe:
+    """Records one row per Power BI backend query sent by a virtual user's page.
+
+    Rows are handed to `on_record` as soon as each request settles:
+
+        [timestamp, user_id, step, url_class, status, duration_ms, ttfb_ms,
+         server_timing, request_bytes, response_bytes, request_id]
+
+    `step` is the span that was open when the request was sent. Only timing metadata and
+    transfer sizes are read; response bodies are never buffered.
+    """
+
+    def __init__(self, page, user_id, spans, on_record):
+        self.user_id = user_id
+        self.spans = spans
+        self.on_record = on_record
+        self._sent = {}  # request -> (timestamp, step, url_class, perf_counter_ns at send)
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_request_finished)
+        page.on("requestfailed", self._on_request_failed)
+
+    def _on_request(self, request):
+        url_class = classify_url(request.url)
+        if url_class:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._sent[request] = (timestamp, self.spans.current_step, url_class, time.perf_counter_ns())
+
+    async def _on_request_finished(self, request):
+        sent = self._sent.pop(request, None)
+        if not sent:
+            return
+        timestamp, step, url_class, sent_ns = sent
+        duration_ms = round((time.perf_counter_ns() - sent_ns) / 1_000_000, 1)
+        try:
+            timing = request.timing
+            sizes = await request.sizes()
+            response = await request.response()
+            status = response.status if response else "N/A"
+            headers = response.headers if response else {}
+            ttfb_ms = timing["responseStart"] - timing["requestStart"] if timing["requestStart"] >= 0 else None
+            self.on_record([
+                timestamp, self.user_id, step, url_class, status, duration_ms, _ms(ttfb_ms),
+                headers.get("server-timing", ""), sizes["requestBodySize"], sizes["responseBodySize"],
+                headers.get("requestid", ""),
+            ])
+        except Exception as e:
+            # The page may already be closed when a late request settles
+            logger.debug(f"[User {self.user_id}] Could not read timings for {request.url}: {e}")
+
+    def _on_request_failed(self, request):
+        sent = self._sent.pop(request, None)
+        if not sent:
+            return
+        timestamp, step, url_class, sent_ns = sent
+        duration_ms = round((time.perf_counter_ns() - sent_ns) / 1_000_000, 1)
+        self.on_record([
+            timestamp, self.user_id, step, url_class, f"Failed: {request.failure}", duration_ms, "N/A",
+            "", "N/A", "N/A", "",
+        ])
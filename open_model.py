@@ -0,0 +1,50 @@
+import os
+import random
+
+# > 0: new report sessions arrive at this rate, however slow the capacity is; 0: the closed model of USER_IDS
+ARRIVAL_RATE_PER_MIN = float(os.getenv("ARRIVAL_RATE_PER_MIN", "0"))
+ARRIVAL_PROCESS = os.getenv("ARRIVAL_PROCESS", "poisson")  # poisson | constant
+ARRIVAL_DURATION_S = int(os.getenv("ARRIVAL_DURATION_S", "1800"))
+ARRIVAL_MAX_IN_FLIGHT = int(os.getenv("ARRIVAL_MAX_IN_FLIGHT", "20"))
+ARRIVAL_SEED = os.getenv("ARRIVAL_SEED")  # default: the run id
+ARRIVAL_PROCESSES = ("poisson", "constant")
+QUEUE_STEP = "queue"
+
+if ARRIVAL_PROCESS not in ARRIVAL_PROCESSES:
+    raise ValueError(f"Unknown ARRIVAL_PROCESS {ARRIVAL_PROCESS!r}, expected one of {ARRIVAL_PROCESSES}")
+
+
+def open_test_name(test_name, rate_per_min=ARRIVAL_RATE_PER_MIN):
+    """Result folder name of an open-model run: every arrival rate is its own curve."""
+    return f"{test_name}@open_{rate_per_min:g}_per_min"
+
+
+def arrival_offsets(rate_per_min, duration_s, process=ARRIVAL_PROCESS, seed=None, worker=0, workers=1):
+    """Arrival times (seconds after the start) of one worker's share of the arrival process.
+
+    A Poisson process split over n workers is n independent Poisson processes at 1/n of the
+    rate; a constant rate is split by giving each worker every n-th slot.
+    """
+    rate_per_s = rate_per_min / 60
+    if rate_per_s <= 0:
+        return
+    if process == "constant":
+        interval = 1 / rate_per_s
+        offset = worker * interval
+        while offset < duration_s:
+            yield offset
+            offset += workers * interval
+        return
+    rng = random.Random(f"{seed}/{worker}")
+    offset = rng.expovariate(rate_per_s / workers)
+    while offset < duration_s:
+        yield offset
+        offset += rng.expovariate(rate_per_s / workers)
+
+
+def worker_share(config):
+    """(worker index, worker count) when every xdist worker runs the arrival test (`--dist each`), else (0, 1)."""
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if not worker or config.getoption("dist", "no") != "each":
+        return 0, 1
+    return int(worker.lstrip("gw")), int(os.environ["PYTEST_XDIST_WORKER_COUNT"])
@@ -1,57 +1,121 @@
-import os
+import sys
+import json
+import argparse
+from pathlib import Path
 import pandas as pd
 
-def parse_csv_files(root_folder):
-    records = []
-
-    for dirpath, _, filenames in os.walk(root_folder):
-        rel_path = os.path.relpath(dirpath, root_folder)
-        parts = rel_path.split(os.sep)
-
-        if len(parts) >= 2 and '=' in parts[1]:
-            parent = parts[0]
-            child = parts[1].split('=')[1]
-
-        #     print("Parent:", parent)
-        #     print("Child:", child)
-        # print(f"Processing directory: {rel_path}")
-        # print(f"dirpath found: {dirpath}")
-        for file in filenames:
-            if file.endswith(".csv"):
-                full_path = os.path.join(dirpath, file)
-                try:
-                    df = pd.read_csv(full_path, header=None, dtype=str)
-                except Exception as e:
-                    print(f"Failed to read {full_path}: {e}")
-                    continue
-
-                for idx, row in df.iterrows():
-                    # Skip empty or incomplete rows
-                    if len(row) < 3 or pd.isna(row.iloc[0]) or pd.isna(row.iloc[1]):
-                        continue
-
-                    start_time = row.iloc[0]
-                    user = row.iloc[1]
-                    status_raw = str(row.iloc[2]) if len(row) > 2 else ""
-                    duration = row.iloc[3] if len(row) > 3 and pd.notna(row.iloc[3]) else ""
-
-                    # Clean status
-                    if "Success" in status_raw:
-                        status = "Success"
-                    elif "Failed" in status_raw or "Error" in status_raw:
-                        status = "error"
-                    else:
-                        status = status_raw.strip()
-
-                    records.append(f"{parent},{child},{start_time},{user},{status},{duration}")
-
-    return records
-
-# Example usage
-folder_path = r"C:\Repos\pytest_playwright_perf"
-consolidated_records = parse_csv_files(folder_path)
-
-# Output result
-with open("consolidated_output.txt", "w", encoding="utf-8") as f:
-    for record in consolidated_records:
-        f.write(record + "\n")
+ROOT = Path(__file__).resolve().parent
+OUTPUT_FILE = "consolidated_output.txt"
+SCENARIO_STEP = "scenario"
+
+COLUMNS = ["timestamp", "user_id", "status", "duration"]
+# Header names used by the different generations of performance_logs*.csv
+DURATION_ALIASES = {"duration_ms": "duration", "load_time_ms": "duration"}
+
+
+def iter_result_dirs(root):
+    """Yield (test, number_of_users, directory) for every <test>/number_of_users=N folder."""
+    for test_dir in sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")):
+        for users_dir in sorted(test_dir.glob("number_of_users=*")):
+            if users_dir.is_dir():
+                yield test_dir.name, users_dir.name.split("=", 1)[1], users_dir
+
+
+def read_result_file(path, skip_rows=0):
+    """Scenario-level rows of one performance log as typed string columns.
+
+    Handles the header-less timestamp,user_id,status,load_time files, the per-step files
+    (extra step/think_ms columns) and the schema-versioned files with a header row.
+    Returns (frame, total data rows in the file) so a growing file can be resumed.
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        has_header = f.readline().startswith("timestamp,")
+    if has_header:
+        df = pd.read_csv(path, dtype="string", encoding="utf-8-sig", on_bad_lines="skip")
+        df = df.rename(columns=DURATION_ALIASES)
+    else:
+        df = pd.read_csv(path, header=None, dtype="string", encoding="utf-8-sig", on_bad_lines="skip")
+        df = df.rename(columns=dict(enumerate(COLUMNS + ["step"])))
+    total_rows = len(df)
+    df = df.iloc[skip_rows:]
+    if "step" in df.columns:
+        df = df[df["step"].isna() | (df["step"] == SCENARIO_STEP)]
+    df = df.reindex(columns=COLUMNS)
+    return df.dropna(subset=["timestamp", "user_id"]), total_rows
+
+
+def classify_status(status):
+    status = status.fillna("")
+    return status.str.strip().mask(status.str.contains("Failed|Error"), "error").mask(status.str.contains("Success"), "Success")
+
+
+def manifest_path(output):
+    """The manifest of one output file, next to it: consolidated_output.txt -> .consolidated_output.txt.manifest.json"""
+    return output.with_name(f".{output.name}.manifest.json")
+
+
+def load_manifest(path):
+    """The manifest at path, or None if there is none (the output then has to be rebuilt)."""
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return None
+
+
+def consolidate(root=ROOT, output=None, rebuild=False):
+    """Append rows from new or grown performance logs to the consolidated output.
+
+    A manifest of (size, mtime, rows) per ingested file lets repeated runs skip every log
+    that has not changed, so the cost follows the new results rather than the whole history.
+    Without the output or its manifest (e.g. a fresh checkout) the output is rebuilt instead,
+    as appending would add every row it already holds once more.
+    """
+    root = Path(root)
+    output = Path(output) if output else root / OUTPUT_FILE
+    manifest_file = manifest_path(output)
+    manifest = None if rebuild or not output.exists() else load_manifest(manifest_file)
+    rebuild = manifest is None
+    manifest = manifest or {}
+
+    frames = []
+    for test, number_of_users, users_dir in iter_result_dirs(root):
+        for path in sorted(users_dir.glob("performance_logs*.csv")):
+            key = path.relative_to(root).as_posix()
+            stat = path.stat()
+            seen = manifest.get(key)
+            if seen and seen["size"] == stat.st_size and seen["mtime"] == stat.st_mtime:
+                continue
+            # Logs are append-only; anything that did not grow was rewritten and is read again
+            grown = seen and stat.st_size > seen["size"]
+            skip_rows = seen["rows"] if grown else 0
+            try:
+                df, total_rows = read_result_file(path, skip_rows)
+            except Exception as e:
+                print(f"Failed to read {path}: {e}")
+                continue
+            if seen and not grown:
+                print(f"⚠️ {key} was rewritten; its earlier rows may be duplicated, use --rebuild")
+            frames.append(df.assign(test=test, number_of_users=number_of_users))
+            manifest[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "rows": total_rows}
+
+    new_rows = 0
+    mode = "w" if rebuild else "a"
+    with output.open(mode, encoding="utf-8", newline="") as f:
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+            df["status"] = classify_status(df["status"])
+            df["duration"] = df["duration"].fillna("")
+            df[["test", "number_of_users"] + COLUMNS].to_csv(f, header=False, index=False, lineterminator="\n")
+            new_rows = len(df)
+
+    manifest_file.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return new_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consolidate performance_logs*.csv into one text file")
+    parser.add_argument("root", nargs="?", default=ROOT, help="folder holding the <test>/number_of_users=N results")
+    parser.add_argument("--output", help=f"defaults to <root>/{OUTPUT_FILE}")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the manifest and rewrite the output")
+    args = parser.parse_args()
+    n = consolidate(args.root, args.output, args.rebuild)
+    print(f"📄 {n} new rows consolidated", file=sys.stderr)
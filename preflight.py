@@ -0,0 +1,139 @@
+import os
+import sys
+import asyncio
+import logging
+import importlib
+from pathlib import Path
+from dotenv import load_dotenv
+from auth_cache import AUTH_CACHE
+from browser_pool import BrowserPool
+from timing import SpanRecorder
+from render_wait import RenderWatcher
+from think_time import ThinkTime
+from scenario_engine import VirtualUser
+from credential_pool import CREDENTIAL_POOL, user_credentials
+
+# false: skip the check of every test module before the load starts
+PREFLIGHT = os.getenv("PREFLIGHT", "true").lower() in ("1", "true", "yes")
+# A drifted selector fails after this instead of the load run's 120 s default
+PREFLIGHT_TIMEOUT_MS = int(os.getenv("PREFLIGHT_TIMEOUT_MS", "15000"))
+PREFLIGHT_NAVIGATION_TIMEOUT_MS = int(os.getenv("PREFLIGHT_NAVIGATION_TIMEOUT_MS", "60000"))
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_steps(steps, user, path, failures, warnings, optional=False):
+    """Run the steps and keep going past failures; groups are checked child by child.
+
+    Optional steps (or steps of an optional group) are run with their failures raised too:
+    the load run would skip them, but only after every user waited out their timeout, so
+    they go to warnings instead of failures.
+    """
+    for step in steps:
+        if step.kind == "think":
+            continue
+        name = "/".join(path + [step.span])
+        step_optional = optional or step.optional
+        if step.kind == "group":
+            await _run_steps(step.children, user, path + [step.span], failures, warnings, step_optional)
+            continue
+        step.optional = False  # these steps are bound for the pre-flight only
+        try:
+            await step.run(user)
+            logger.info(f"[Pre-flight] ✅ {name}")
+        except Exception as e:
+            error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            hint = " (may follow from an earlier failure)" if failures or warnings else ""
+            if step_optional:
+                warnings.append((name, error))
+                logger.warning(f"[Pre-flight] ⚠️ {name} (optional): {error}{hint}")
+            else:
+                failures.append((name, error))
+                logger.error(f"[Pre-flight] ❌ {name}: {error}{hint}")
+
+
+async def preflight_scenario(scenario, user_id, browser_pool, timeout_ms=PREFLIGHT_TIMEOUT_MS,
+                             navigation_timeout_ms=PREFLIGHT_NAVIGATION_TIMEOUT_MS):
+    """Run the scenario once as user_id with short timeouts; (failures, warnings) as (step, error)
+    lists of the broken required and optional steps.
+
+    Nothing is sent to the results sink and think steps are skipped.
+    """
+    # Released without a cooldown: the run itself starts right after
+    async with user_credentials(user_id, cooldown_s=0) as (username, password):
+        if not username or not password:
+            return [("credentials", f"PBI_USERNAME_{user_id} / PBI_PASSWORD_{user_id} missing in users.env"
+                                    + (" or no free account in the credential pool" if CREDENTIAL_POOL else ""))], []
+        async with browser_pool.context(storage_state=AUTH_CACHE.load(username), ignore_https_errors=True,
+                                        bypass_csp=True, locale='en-US', user_agent='PlaywrightTestAgent') as context:
+            page = await context.new_page()
+            page.set_default_navigation_timeout(navigation_timeout_ms)
+            page.set_default_timeout(timeout_ms)
+            spans = SpanRecorder(user_id, lambda row: None)
+            user = VirtualUser(user_id, page, scenario.report_url, username, password, spans,
+                               RenderWatcher(page, timeout_ms), ThinkTime(user_id, **scenario.think_time))
+            failures, warnings = [], []
+            try:
+                # Step budgets and render waits are capped at the pre-flight timeouts too
+                await _run_steps(scenario.bind(page, max_timeout_ms=timeout_ms,
+                                               navigation_timeout_ms=navigation_timeout_ms), user, [], failures,
+                                 warnings)
+            finally:
+                await page.close()
+            return failures, warnings
+
+
+async def preflight(checks):
+    """Pre-flight every (scenario, user_id); {scenario description: failures} of the broken ones.
+
+    Broken optional steps do not fail the check but are logged as a warning report.
+    """
+    pool = await BrowserPool().start()
+    broken, degraded = {}, {}
+    try:
+        for scenario, user_id in checks:
+            label = f"{scenario.name} on {scenario.report}"
+            logger.info(f"🛫 Pre-flight of {label} as user {user_id}...")
+            failures, warnings = await preflight_scenario(scenario, user_id, pool)
+            if failures:
+                broken[label] = failures
+            if warnings:
+                degraded[label] = warnings
+    finally:
+        await pool.close()
+    if degraded:
+        logger.warning(f"⚠️ Pre-flight: optional steps are broken, every user will wait out their timeout:\n"
+                       f"{format_report(degraded, 'broken optional step(s)')}")
+    return broken
+
+
+def module_checks(paths):
+    """The (scenario, user_id) pre-flight checks of the given test module paths (pytest node ids allowed)."""
+    checks = []
+    for arg in paths:
+        path = Path(str(arg).split("::")[0])
+        if path.suffix != ".py" or not path.name.startswith("test_"):
+            continue
+        sys.path.insert(0, str(path.resolve().parent))
+        module = importlib.import_module(path.stem)
+        checks += getattr(getattr(module, "test_powerbi_load", None), "preflight", [])
+    return checks
+
+
+def format_report(broken, what="broken step(s)"):
+    lines = []
+    for label, failures in broken.items():
+        lines.append(f"{label}: {len(failures)} {what}")
+        lines += [f"  - {step}: {error}" for step, error in failures]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    load_dotenv("users.env")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    if len(sys.argv) < 2:
+        sys.exit("usage: python preflight.py test_<module>.py [...]")
+    broken = asyncio.run(preflight(module_checks(sys.argv[1:])))
+    if broken:
+        print(format_report(broken))
+    sys.exit(1 if broken else 0)
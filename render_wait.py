@@ -0,0 +1,88 @@
+import asyncio
+import re
+import time
+import logging
+
+# Requests that mean "a visual is still waiting for data" (DAX queries, model/schema loads)
+QUERY_URL_PATTERN = re.compile(r"/(querydata|executeQueries|conceptualschema|modelsAndExploration)", re.IGNORECASE)
+# Loading indicators Power BI draws inside a visual-container while it renders
+SPINNER_SELECTOR = ".powerbi-spinner, .circle-progress, .spinner, .loadingIndicator, [data-testid='visual-loading']"
+RENDER_TIMEOUT_MS = 120000
+DOM_QUIET_MS = 500
+
+# Resolves once no spinner is visible and the report DOM has not mutated for `quietMs`
+RENDER_STABLE_JS = """
+({ spinnerSelector, quietMs }) => {
+    if (!window.__perfLastMutation) {
+        window.__perfLastMutation = performance.now();
+        new MutationObserver(() => { window.__perfLastMutation = performance.now(); })
+            .observe(document.body, { childList: true, subtree: true, attributes: true, characterData: true });
+        return false;
+    }
+    const spinning = [...document.querySelectorAll(`visual-container :is(${spinnerSelector})`)]
+        .some(el => el.offsetParent !== null);
+    return !spinning && performance.now() - window.__perfLastMutation >= quietMs;
+}
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class RenderWatcher:
+    """Knows when every visual-container on the current report page has finished rendering.
+
+    Attach one per page: it counts in-flight Power BI query requests through page.on(...)
+    and combines that with an in-page check for spinners and a quiet DOM.
+    """
+
+    def __init__(self, page, timeout_ms=RENDER_TIMEOUT_MS):
+        self.page = page
+        self.timeout_ms = timeout_ms  # for waits without a timeout of their own (the step's budget)
+        self._in_flight = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_request_done)
+        page.on("requestfailed", self._on_request_done)
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def _on_request(self, request):
+        if QUERY_URL_PATTERN.search(request.url):
+            self._in_flight.add(request)
+            self._idle.clear()
+
+    def _on_request_done(self, request):
+        self._in_flight.discard(request)
+        if not self._in_flight:
+            self._idle.set()
+
+    async def wait_for_render(self, timeout_ms=None, quiet_ms=DOM_QUIET_MS):
+        """Wait until no queries are in flight, no spinner is visible and the DOM is stable.
+
+        Returns the measured time-to-render in ms; raises TimeoutError after timeout_ms
+        (default: the watcher's timeout_ms).
+        """
+        timeout_ms = timeout_ms or self.timeout_ms
+        start = time.perf_counter_ns()
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Report did not finish rendering within {timeout_ms} ms "
+                                   f"({self.in_flight} queries still in flight)")
+            await asyncio.wait_for(self._idle.wait(), remaining)
+            await self.page.wait_for_function(
+                RENDER_STABLE_JS,
+                arg={"spinnerSelector": SPINNER_SELECTOR, "quietMs": quiet_ms},
+                polling=100,
+                timeout=max(1, (deadline - time.monotonic()) * 1000),
+            )
+            # A visual may have fired a new query while the DOM was settling
+            if self._idle.is_set():
+                break
+        render_ms = round((time.perf_counter_ns() - start) / 1_000_000, 1)
+        logger.debug(f"Report rendered in {render_ms} ms")
+        return render_ms
@@ -0,0 +1,216 @@
+import os
+import csv
+import json
+import asyncio
+import logging
+import threading
+import socketserver
+from datetime import datetime
+from pathlib import Path
+from latency_stats import SummaryBuilder, write_summary
+from circuit_breaker import CircuitBreaker
+
+SCHEMA_VERSION = 3
+RUN_ID_FORMAT = "%Y_%m_%d_%H_%M_%S"
+
+# kind -> (file prefix, columns); schema_version/run_id go last so the first four
+# columns keep the original timestamp,user_id,status,load_time layout
+RESULT_FILES = {
+    "span": ("performance_logs", ["timestamp", "user_id", "status", "duration_ms", "step", "think_ms", "iteration"]),
+    "user": ("user_events", ["timestamp", "user_id", "event", "iteration"]),
+    "query": ("network_logs", ["timestamp", "user_id", "step", "url_class", "status", "duration_ms", "ttfb_ms",
+                               "server_timing", "request_bytes", "response_bytes", "request_id"]),
+}
+TRAILING_COLUMNS = ["run_id", "schema_version"]
+
+logger = logging.getLogger(__name__)
+
+
+def current_run_id():
+    """The run id shared by the controller and every xdist worker (PERF_RUN_ID)."""
+    return os.environ.setdefault("PERF_RUN_ID", datetime.now().strftime(RUN_ID_FORMAT))
+
+
+def result_path(root, kind, test, number_of_users, run_id):
+    prefix, _ = RESULT_FILES[kind]
+    return Path(root) / test / f"number_of_users={number_of_users}" / f"{prefix}_{run_id}.csv"
+
+
+class ResultsServer:
+    """Controller-owned results sink for one run.
+
+    Workers stream JSON lines ({"kind", "test", "number_of_users", "row"}) over a local
+    TCP socket. Each (kind, test, number_of_users) gets exactly one CSV for the run, with a
+    header and schema_version/run_id columns, plus runs/<run_id>.json describing the run.
+    Span rows also feed per-(test, users, step) latency histograms, saved next to the index
+    as runs/<run_id>_histograms.json (mergeable across runs) and runs/<run_id>_summary.csv.
+    They also feed the run's circuit breaker: once it trips, every connected worker gets an
+    {"abort": reason} line back and stops its users.
+    """
+
+    def __init__(self, root, run_id, settings=None, host="127.0.0.1", port=0, breaker=None):
+        self.root = Path(root)
+        self.run_id = run_id
+        self.settings = settings or {}  # recorded in the run index, e.g. sampling seeds
+        self.started = datetime.now()
+        self._files = {}  # (kind, test, number_of_users) -> (file, writer, row count)
+        self.stats = SummaryBuilder()
+        self.breaker = breaker or CircuitBreaker()
+        self.aborted = None  # the breaker's reason once it tripped
+        self.active_users = 0  # virtual users between their "start" and "stop" user events
+        self._clients = set()  # wfile of every connected worker
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class(), bind_and_activate=True)
+        self._server.block_on_close = True  # server_close() waits for workers' connections to drain
+        self._thread = threading.Thread(target=self._server.serve_forever, name="results-sink", daemon=True)
+
+    @property
+    def address(self):
+        host, port = self._server.server_address
+        return f"{host}:{port}"
+
+    def _handler_class(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                with sink._lock:
+                    sink._clients.add(self.wfile)
+                    if sink.aborted:
+                        sink._send_abort(self.wfile)
+                try:
+                    for line in self.rfile:
+                        if line.strip():
+                            sink.write(json.loads(line))
+                finally:
+                    with sink._lock:
+                        sink._clients.discard(self.wfile)
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"📥 Results sink for run {self.run_id} listening on {self.address}")
+        return self
+
+    def write(self, record):
+        key = (record["kind"], record["test"], int(record["number_of_users"]))
+        with self._lock:
+            if key not in self._files:
+                path = result_path(self.root, *key, self.run_id)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                file = path.open("w", newline="", encoding="utf-8")
+                writer = csv.writer(file)
+                writer.writerow(RESULT_FILES[key[0]][1] + TRAILING_COLUMNS)
+                self._files[key] = [file, writer, 0]
+            entry = self._files[key]
+            entry[1].writerow(list(record["row"]) + [self.run_id, SCHEMA_VERSION])
+            entry[0].flush()
+            entry[2] += 1
+            if key[0] == "user":
+                self.active_users += 1 if record["row"][2] == "start" else -1
+            if key[0] == "span":
+                timestamp, _, status, duration_ms, step = record["row"][:5]
+                self.stats.add(key[1], key[2], step, timestamp, status, duration_ms)
+                if not self.aborted and self.breaker.add(step, status, duration_ms):
+                    self.aborted = self.breaker.reason
+                    logger.error(f"🛑 Circuit breaker tripped, stopping every worker: {self.aborted}")
+                    for wfile in list(self._clients):
+                        self._send_abort(wfile)
+
+    def _send_abort(self, wfile):
+        try:
+            wfile.write((json.dumps({"abort": self.aborted}, ensure_ascii=False) + "\n").encode("utf-8"))
+            wfile.flush()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not signal a worker to stop: {e}")
+
+    def close(self, finished=True):
+        """Write the run index; `complete` only if the caller saw the run finish (finished), the
+        breaker did not abort it and every virtual user that started also stopped."""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            files = []
+            for (kind, test, number_of_users), (file, _, rows) in self._files.items():
+                file.close()
+                files.append({"kind": kind, "test": test, "number_of_users": number_of_users, "rows": rows,
+                              "path": str(Path(file.name).relative_to(self.root))})
+            self._files.clear()
+        meta_path = self.root / "runs" / f"{self.run_id}.json"
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        histograms_path = meta_path.with_name(f"{self.run_id}_histograms.json")
+        histograms_path.write_text(json.dumps(self.stats.to_dict(), ensure_ascii=False), encoding="utf-8")
+        with meta_path.with_name(f"{self.run_id}_summary.csv").open("w", newline="", encoding="utf-8") as f:
+            write_summary(self.stats, f)
+        complete = finished and not self.aborted and self.active_users == 0
+        if not complete:
+            logger.warning(f"⚠️ Run {self.run_id} is indexed as incomplete (finished: {finished}, "
+                           f"aborted: {self.aborted}, users still active: {self.active_users})")
+        meta = {"run_id": self.run_id, "schema_version": SCHEMA_VERSION, "complete": complete,
+                "started": self.started.isoformat(timespec="seconds"),
+                "finished": datetime.now().isoformat(timespec="seconds"), "files": files,
+                "histograms": str(histograms_path.relative_to(self.root)), "aborted": self.aborted,
+                "settings": {**self.settings, "circuit_breaker": self.breaker.settings}}
+        meta_path.write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info(f"📄 Run {self.run_id} results indexed in {meta_path}")
+
+
+class ResultsClient:
+    """Worker side of the sink: emit() only queues, a background task does the socket I/O.
+
+    Another task listens for the controller's abort signal and sets `aborted`.
+    """
+
+    def __init__(self, address):
+        self.host, port = address.rsplit(":", 1)
+        self.port = int(port)
+        self._queue = asyncio.Queue()
+        self._writer = None
+        self._task = None
+        self._listener = None
+        self.aborted = asyncio.Event()
+        self.abort_reason = None
+
+    async def start(self):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._task = asyncio.create_task(self._drain())
+        self._listener = asyncio.create_task(self._listen(reader))
+        return self
+
+    async def _listen(self, reader):
+        while line := await reader.readline():
+            message = json.loads(line)
+            if "abort" in message:
+                self.abort_reason = message["abort"]
+                self.aborted.set()
+                logger.error(f"🛑 Run aborted by the controller: {self.abort_reason}")
+
+    def emit(self, kind, test, number_of_users, row):
+        record = {"kind": kind, "test": test, "number_of_users": number_of_users, "row": row}
+        self._queue.put_nowait((json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+
+    def recorder(self, kind, test, number_of_users):
+        """An on_record callback for SpanRecorder / NetworkProbe."""
+        return lambda row: self.emit(kind, test, number_of_users, row)
+
+    async def _drain(self):
+        while True:
+            line = await self._queue.get()
+            if line is None:
+                break
+            self._writer.write(line)
+            while not self._queue.empty():
+                line = self._queue.get_nowait()
+                if line is None:
+                    await self._writer.drain()
+                    return
+                self._writer.write(line)
+            await self._writer.drain()
+
+    async def close(self):
+        self._queue.put_nowait(None)
+        await self._task
+        self._listener.cancel()
+        self._writer.close()
+        await self._writer.wait_closed()
@@ -0,0 +1,231 @@
+import os
+import sys
+import csv
+import math
+import random
+import argparse
+from itertools import accumulate
+from pathlib import Path
+from latency_stats import summarize_tree, SCENARIO_STEP
+
+# Service level the capacity is judged against
+SLA_MS = float(os.getenv("SLA_MS", "600000"))
+SLA_METRIC = os.getenv("SLA_METRIC", "p95")  # p50 | p90 | p95 | p99 | mean
+SLA_MAX_ERROR_RATE = float(os.getenv("SLA_MAX_ERROR_RATE", "0.01"))
+BOOTSTRAP_SAMPLES = int(os.getenv("BOOTSTRAP_SAMPLES", "200"))
+# Draws per concurrency level and bootstrap replicate; fewer draws than recorded samples
+# only widen the intervals, so soak runs stay fast at the price of conservative bounds
+BOOTSTRAP_MAX_DRAWS = 5000
+
+CURVE_HEADER = ["test", "number_of_users", "count", "errors", "error_rate", "p50_ms", "p90_ms", "p95_ms",
+                "p99_ms", "max_ms", "mean_ms", "throughput_per_s", "model_ms"]
+
+
+def metric(histogram, name):
+    return histogram.mean_ms if name == "mean" else histogram.percentile(int(name.lstrip("p")))
+
+
+def _solve(matrix, vector):
+    """Gaussian elimination with partial pivoting; None when the system is singular."""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(n):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [x - factor * y for x, y in zip(rows[r], rows[col])]
+    return [rows[i][n] / rows[i][i] for i in range(n)]
+
+
+def fit_usl(points):
+    """Least-squares fit of R(N) = a + b(N-1) + cN(N-1) with a > 0 and b, c >= 0.
+
+    This is the Universal Scalability Law written for response time: a is the uncontended
+    latency, sigma = b/a the contention (serialization) share and kappa = c/a the coherency
+    (crosstalk) cost. Every non-negative sub-model is fitted and the best one kept, so a
+    flat or linear curve yields kappa = 0 instead of a meaningless negative coefficient.
+    Returns (a, b, c) or None with fewer than two concurrency levels.
+    """
+    if len({n for n, _ in points}) < 2:
+        return None
+    features = [lambda n: 1.0, lambda n: n - 1.0, lambda n: n * (n - 1.0)]
+    best = None
+    for terms in ((0,), (0, 1), (0, 2), (0, 1, 2)):
+        xs = [[features[t](n) for t in terms] for n, _ in points]
+        ys = [r for _, r in points]
+        normal = [[sum(x[i] * x[j] for x in xs) for j in range(len(terms))] for i in range(len(terms))]
+        coef = _solve(normal, [sum(x[i] * y for x, y in zip(xs, ys)) for i in range(len(terms))])
+        if coef is None or coef[0] <= 0 or any(c < 0 for c in coef[1:]):
+            continue
+        params = [0.0, 0.0, 0.0]
+        for t, c in zip(terms, coef):
+            params[t] = c
+        sse = sum((usl_latency(params, n) - r) ** 2 for n, r in points)
+        if best is None or sse < best[0] - 1e-9:
+            best = (sse, tuple(params))
+    return best[1] if best else None
+
+
+def usl_latency(params, n):
+    a, b, c = params
+    return a + b * (n - 1) + c * n * (n - 1)
+
+
+def knee(params):
+    """Concurrency of peak throughput, sqrt((1 - sigma) / kappa); inf without coherency cost."""
+    a, b, c = params
+    sigma, kappa = b / a, c / a
+    if kappa <= 0 or sigma >= 1:
+        return math.inf if kappa <= 0 else 1.0
+    return math.sqrt((1 - sigma) / kappa)
+
+
+def max_users_within(params, sla_ms):
+    """Largest N whose modelled latency stays within sla_ms (0 if even one user misses it)."""
+    a, b, c = params
+    if a > sla_ms:
+        return 0
+    if c > 0:
+        # c N^2 + (b - c) N + (a - b - sla) = 0
+        qb, qc = b - c, a - b - sla_ms
+        return math.floor((-qb + math.sqrt(qb * qb - 4 * c * qc)) / (2 * c))
+    if b > 0:
+        return math.floor((sla_ms - a) / b + 1)
+    return math.inf
+
+
+def _resample(histogram, rng):
+    values, weights = zip(*histogram.buckets())
+    cum = list(accumulate(weights))
+    draws = min(histogram.total, BOOTSTRAP_MAX_DRAWS)
+    sample = sorted(rng.choices(values, cum_weights=cum, k=draws))
+    return sample
+
+
+def _sample_metric(sample, name):
+    if name == "mean":
+        return sum(sample) / len(sample)
+    p = int(name.lstrip("p"))
+    return sample[max(0, -(-len(sample) * p // 100) - 1)]
+
+
+def _interval(values, confidence=0.95):
+    values = sorted(values)
+    if not values:
+        return None, None
+    lo = values[int((1 - confidence) / 2 * (len(values) - 1))]
+    hi = values[int((1 + confidence) / 2 * (len(values) - 1))]
+    return lo, hi
+
+
+def analyze_test(stats_by_users, sla_ms=SLA_MS, metric_name=SLA_METRIC, max_error_rate=SLA_MAX_ERROR_RATE,
+                 bootstrap=BOOTSTRAP_SAMPLES, seed=0):
+    """Capacity verdict for one test from its {number_of_users: StepStats}."""
+    levels = {n: s for n, s in sorted(stats_by_users.items()) if s.histogram.total}
+    points = [(n, metric(s.histogram, metric_name)) for n, s in levels.items()]
+    params = fit_usl(points)
+    result = {"levels": len(levels), "params": params, "knee": None, "max_users": None,
+              "observed_max_users": None, "sigma_ci": (None, None), "kappa_ci": (None, None),
+              "knee_ci": (None, None), "max_users_ci": (None, None)}
+    # Highest tested concurrency that met the SLA and the error budget, and every level below it too
+    for n, s in sorted(stats_by_users.items()):
+        summary = s.summary()
+        met = s.histogram.total and metric(s.histogram, metric_name) <= sla_ms and summary["error_rate"] <= max_error_rate
+        if not met:
+            break
+        result["observed_max_users"] = n
+    if not params:
+        return result
+    result["knee"] = knee(params)
+    result["max_users"] = max_users_within(params, sla_ms)
+
+    rng = random.Random(seed)
+    sigmas, kappas, knees, max_users = [], [], [], []
+    for _ in range(bootstrap):
+        replicate = [(n, _sample_metric(_resample(s.histogram, rng), metric_name)) for n, s in levels.items()]
+        fitted = fit_usl(replicate)
+        if not fitted:
+            continue
+        sigmas.append(fitted[1] / fitted[0])
+        kappas.append(fitted[2] / fitted[0])
+        knees.append(knee(fitted))
+        max_users.append(max_users_within(fitted, sla_ms))
+    result.update(sigma_ci=_interval(sigmas), kappa_ci=_interval(kappas),
+                  knee_ci=_interval(knees), max_users_ci=_interval(max_users))
+    return result
+
+
+def by_test(builder, step=SCENARIO_STEP):
+    tests = {}
+    for (test, number_of_users, group_step), stats in builder.groups.items():
+        if group_step == step:
+            tests.setdefault(test, {})[number_of_users] = stats
+    return tests
+
+
+def curve_rows(test, stats_by_users, params):
+    for n, stats in sorted(stats_by_users.items()):
+        summary = stats.summary()
+        model = round(usl_latency(params, n), 1) if params else None
+        yield [test, n, *(summary[c] for c in CURVE_HEADER[2:-1]), model]
+
+
+def _fmt(value, digits=1):
+    if value is None:
+        return "-"
+    if value == math.inf:
+        return "inf"
+    return f"{value:.{digits}f}" if isinstance(value, float) else str(value)
+
+
+def report(tests, results, sla_ms, metric_name, max_error_rate, file=sys.stdout):
+    print(f"SLA: {metric_name} <= {sla_ms:.0f} ms, error rate <= {max_error_rate:.1%}", file=file)
+    for test in sorted(results):
+        r = results[test]
+        print(f"\n{test} ({r['levels']} concurrency levels)", file=file)
+        for n, stats in sorted(tests[test].items()):
+            s = stats.summary()
+            print(f"  N={n:>4}  {metric_name}={_fmt(metric(stats.histogram, metric_name)):>10} ms  "
+                  f"errors={_fmt(s['error_rate'], 3)}  throughput={_fmt(s['throughput_per_s'], 4)}/s", file=file)
+        if not r["params"]:
+            print("  not enough concurrency levels to fit a model", file=file)
+            continue
+        a, b, c = r["params"]
+        print(f"  USL: R(N) = {a:.1f} + {b:.3f}(N-1) + {c:.5f}N(N-1)  "
+              f"sigma={b / a:.5f} [{_fmt(r['sigma_ci'][0], 5)}, {_fmt(r['sigma_ci'][1], 5)}]  "
+              f"kappa={c / a:.7f} [{_fmt(r['kappa_ci'][0], 7)}, {_fmt(r['kappa_ci'][1], 7)}]", file=file)
+        print(f"  knee: N*={_fmt(r['knee'])} [{_fmt(r['knee_ci'][0])}, {_fmt(r['knee_ci'][1])}]", file=file)
+        print(f"  max users within SLA: model {_fmt(r['max_users'])} "
+              f"[{_fmt(r['max_users_ci'][0])}, {_fmt(r['max_users_ci'][1])}], "
+              f"observed {_fmt(r['observed_max_users'])}", file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency/error curves over number_of_users=N, USL fit, knee and SLA capacity")
+    parser.add_argument("root", nargs="?", default=Path(__file__).resolve().parent)
+    parser.add_argument("--tests", nargs="*", help="only these test folders (default: all)")
+    parser.add_argument("--step", default=SCENARIO_STEP, help="span to analyze (default: whole scenario)")
+    parser.add_argument("--sla-ms", type=float, default=SLA_MS)
+    parser.add_argument("--metric", default=SLA_METRIC, choices=["p50", "p90", "p95", "p99", "mean"])
+    parser.add_argument("--max-error-rate", type=float, default=SLA_MAX_ERROR_RATE)
+    parser.add_argument("--bootstrap", type=int, default=BOOTSTRAP_SAMPLES, help="replicates for the confidence intervals")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--curve", help="also write the per-concurrency curve to this CSV")
+    args = parser.parse_args()
+
+    tests = by_test(summarize_tree(args.root), args.step)
+    if args.tests:
+        tests = {t: levels for t, levels in tests.items() if t in args.tests}
+    results = {test: analyze_test(levels, args.sla_ms, args.metric, args.max_error_rate, args.bootstrap, args.seed)
+               for test, levels in tests.items()}
+    report(tests, results, args.sla_ms, args.metric, args.max_error_rate)
+    if args.curve:
+        with open(args.curve, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CURVE_HEADER)
+            for test in sorted(tests):
+                writer.writerows(curve_rows(test, tests[test], results[test]["params"]))
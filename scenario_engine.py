@@ -0,0 +1,884 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from fnmatch import fnmatchcase
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+import pytest
+import yaml
+from dotenv import load_dotenv
+from auth_cache import AUTH_CACHE
+from browser_pool import USERS_PER_WORKER
+from har_tools import har_options
+from timing import SpanRecorder, SCENARIO_STEP
+from render_wait import RenderWatcher
+from slicer_select import VERIFY_TIMEOUT_MS, select_items
+from slider_seek import SliderSeek, SLIDER_DATE_FORMAT
+from think_time import ThinkTime
+from network_probe import NetworkProbe
+from results_sink import current_run_id
+from item_codes import ITEM_CODES_DISJOINT, item_code_sampler
+from cache_mode import CACHE_MODE, ParameterPools, tagged_test
+from workload_mix import load_mix, allocate_users, mix_test_name
+from distributed import run_user_ids
+from credential_pool import user_credentials
+from load_profile import LOAD_PROFILE, active_profile, release_window, run_start_at
+from open_model import (ARRIVAL_RATE_PER_MIN, ARRIVAL_PROCESS, ARRIVAL_DURATION_S, ARRIVAL_MAX_IN_FLIGHT, ARRIVAL_SEED,
+                        QUEUE_STEP, arrival_offsets, open_test_name, worker_share)
+
+load_dotenv("users.env")
+
+RESULTS_ROOT = Path(__file__).resolve().parent
+SCENARIO_DIR = RESULTS_ROOT / "scenarios"
+COMMON_FILE = "common.yaml"
+REPORTS_FILE = "reports.yaml"
+LOG_FILENAME = "performance_debug.log"
+DEFAULT_TIMEOUT_MS = 120000
+VAR_PATTERN = re.compile(r"\$\{(\w+)\}")
+STEP_OPTIONS = ("span", "optional", "timeout_ms", "render", "when")
+# Used JS heap of the page after each iteration, to spot memory growth in long runs (Chromium only)
+JS_HEAP_JS = "() => performance.memory ? performance.memory.usedJSHeapSize : null"
+
+# Scenario iterations per virtual user;
+# DURATION_S > 0 (soak mode) keeps every user starting new iterations until that many seconds have passed
+ITERATIONS = int(os.getenv("ITERATIONS", "1"))
+DURATION_S = int(os.getenv("DURATION_S", "0"))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s',
+    handlers=[logging.FileHandler(LOG_FILENAME, mode='w'), logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+
+# ---- Locators ---------------------------------------------------------------------------
+
+def _segment(base, segment):
+    if "css" in segment:
+        locator = base.locator(segment["css"])
+    elif "role" in segment:
+        locator = base.get_by_role(segment["role"], **{k: segment[k] for k in ("name", "exact") if k in segment})
+    elif "label" in segment:
+        locator = base.get_by_label(segment["label"], exact=segment.get("exact"))
+    elif "text" in segment:
+        locator = base.get_by_text(segment["text"], exact=segment.get("exact"))
+    elif "title" in segment:
+        locator = base.get_by_title(segment["title"], exact=segment.get("exact"))
+    elif "test_id" in segment:
+        locator = base.get_by_test_id(segment["test_id"])
+    elif "frame" in segment:
+        return base.frame_locator(segment["frame"])
+    else:
+        raise ValueError(f"Locator segment needs one of css/role/label/text/title/test_id/frame: {segment}")
+    if "has_text" in segment:
+        locator = locator.filter(has_text=segment["has_text"])
+    if "nth" in segment:
+        locator = locator.nth(segment["nth"])
+    if segment.get("first"):
+        locator = locator.first
+    return locator
+
+
+def build_locator(page, spec, named):
+    """Playwright locator for a spec: a shared locator's name, one segment, or a list of
+    segments chained left to right (a chain may start from a shared locator with {ref: name})."""
+    if isinstance(spec, str):
+        return named[spec]
+    locator = page
+    for segment in spec if isinstance(spec, list) else [spec]:
+        locator = named[segment["ref"]] if "ref" in segment else _segment(locator, segment)
+    return locator
+
+
+def describe(spec):
+    """Short human name of a locator spec, used as the default span name."""
+    if isinstance(spec, str):
+        return spec
+    segment = spec[0] if isinstance(spec, list) else spec
+    for key in ("name", "label", "text", "title", "test_id", "css"):
+        if key in segment:
+            return str(segment[key])
+    return "element"
+
+
+def slicer_opener(arg):
+    if "slicer" in arg:
+        return [{"role": "group", "name": arg["slicer"]}, {"css": "i"}]
+    if "combobox" in arg:
+        return [{"role": "combobox", "name": arg["combobox"]}, {"css": "i"}]
+    return arg["open"]
+
+
+# ---- Actions ----------------------------------------------------------------------------
+# Each action is a factory called once per page with its pre-built locators; it returns the
+# coroutine function that performs the interaction for a VirtualUser.
+
+ACTIONS = {}
+
+
+def action(name, span=None, render=True):
+    def register(factory):
+        ACTIONS[name] = (factory, span, render)
+        return factory
+    return register
+
+
+@action("open_report", span="login")
+def _open_report(page, named, arg):
+    async def run(user):
+        logger.info(f"[User {user.user_id}] Opening report (cached login if available)...")
+        await AUTH_CACHE.open_report(page, user.report_url, user.username, user.password)
+    return run
+
+
+@action("click")
+def _click(page, named, arg):
+    target = build_locator(page, arg, named)
+
+    async def run(user):
+        await target.click()
+    return run
+
+
+@action("clicks")
+def _clicks(page, named, arg):
+    targets = [build_locator(page, spec, named) for spec in arg]
+
+    async def run(user):
+        for target in targets:
+            await target.click()
+    return run
+
+
+@action("buttons")
+def _buttons(page, named, names):
+    return _clicks(page, named, [{"role": "button", "name": name} for name in names])
+
+
+@action("apply_slicers", span="slicer_apply")
+def _apply_slicers(page, named, arg):
+    return _click(page, named, "apply_slicers")
+
+
+@action("clear_filters")
+def _clear_filters(page, named, arg):
+    return _click(page, named, "clear_filters_button")
+
+
+@action("deselect_dimensions", render=False)
+def _deselect_dimensions(page, named, arg):
+    selected = named["selected_dimensions"]
+
+    async def run(user):
+        count = await selected.count()
+        for _ in range(count):
+            await selected.first.click()
+        if count:
+            logger.info(f"[User {user.user_id}] 🧹 Deselected {count} dimensions.")
+    return run
+
+
+@action("reset_to_default")
+def _reset_to_default(page, named, arg):
+    button, ok_button = named["reset_button"], named["reset_ok_button"]
+
+    async def run(user):
+        await button.wait_for(timeout=5000)
+        if not await button.is_enabled():
+            logger.info(f"[User {user.user_id}] ℹ️ Reset button is disabled, nothing to do.")
+            return
+        await button.click()
+        await ok_button.click(timeout=5000)
+        logger.info(f"[User {user.user_id}] 🧹 Filters in the upper right corner have been reset successfully.")
+    return run
+
+
+@action("select_options")
+def _select_options(page, named, arg):
+    opener = build_locator(page, slicer_opener(arg), named)
+    role, names = arg.get("role", "option"), list(arg["options"])
+    inner = arg.get("inner", {"css": "div span"}).get("css")
+    # close: true clicks the opener again; a locator spec closes through another element
+    close = arg.get("close", False)
+    closer = opener if close is True else build_locator(page, close, named) if close else None
+    # verify: false (e.g. "Select all" then deselect) skips the check instead of polling until VERIFY_TIMEOUT_MS
+    verify_timeout_ms = VERIFY_TIMEOUT_MS if arg.get("verify", True) else None
+
+    async def run(user):
+        await opener.click()
+        unselected = await select_items(page, names, role, inner, arg.get("exact"), arg.get("ctrl", False),
+                                        verify_timeout_ms)
+        if unselected:
+            logger.warning(f"[User {user.user_id}] ⚠️ Not selected after picking {len(names)} options: {unselected}")
+        if closer:
+            await closer.click()
+    return run
+
+
+@action("fill", render=False)
+def _fill(page, named, arg):
+    target = build_locator(page, arg["target"], named)
+
+    async def run(user):
+        if "item_codes" in arg:
+            sampler = item_code_sampler()
+            codes = sampler.sample(user.user_id, user.iteration, user.slot)
+            logger.info(f"[User {user.user_id}] 🔢 {len(codes)} item codes, seed {sampler.seed}, slot {user.slot}")
+            text = "\n".join(codes)
+        else:
+            text = str(arg["text"])
+        await target.click()
+        await target.fill(text)
+    return run
+
+
+@action("slider_seek", span="date_slider", render=False)
+def _slider_seek(page, named, arg):
+    slider = build_locator(page, arg.get("target", "date_slider"), named)
+    value = str(arg["value"])
+    date_format = arg.get("date_format", SLIDER_DATE_FORMAT)
+
+    async def run(user):
+        seek = SliderSeek(slider, date_format)
+        if await seek.seek(value):
+            logger.info(f"[User {user.user_id}] 📅 Slider at {value} after {seek.presses} key presses, {seek.reads} reads.")
+        else:
+            logger.warning(f"[User {user.user_id}] ⚠️ Slider did not reach {value} "
+                           f"({seek.presses} key presses, {seek.reads} reads).")
+    return run
+
+
+def _visual_title(page, visual):
+    return page.get_by_label(visual).get_by_test_id("visual-title").get_by_text(visual)
+
+
+@action("drill_down")
+def _drill_down(page, named, visual):
+    title, button = _visual_title(page, visual), named["drill_down_button"]
+
+    async def run(user):
+        await title.click()
+        await button.click()
+    return run
+
+
+@action("drill_up")
+def _drill_up(page, named, visual):
+    title, button = _visual_title(page, visual), named["drill_up_button"]
+
+    async def run(user):
+        await title.click()
+        await button.click()
+    return run
+
+
+@action("scroll_matrix", span="matrix_scroll")
+def _scroll_matrix(page, named, where):
+    matrix = named["matrix"]
+    script = {"bottom": "el => el.scrollTop = el.scrollHeight", "top": "el => el.scrollTop = 0"}[where]
+
+    async def run(user):
+        await matrix.wait_for(state="visible", timeout=10000)
+        await matrix.evaluate(script)
+        logger.info(f"[User {user.user_id}] 🖱️ Scrolled the matrix to the {where}.")
+    return run
+
+
+@action("switch_page", span="switch_page")
+def _switch_page(page, named, name):
+    return _click(page, named, {"role": "button", "name": name})
+
+
+# ---- Steps ------------------------------------------------------------------------------
+
+class Step:
+    """One bound scenario step: an action with its span, render wait, timeout and failure policy."""
+
+    def __init__(self, kind, span=None, run=None, children=(), render=False, optional=False, timeout_ms=None):
+        self.kind = kind
+        self.span = span
+        self._run = run
+        self.children = list(children)
+        self.render = render
+        self.optional = optional
+        self.timeout_ms = timeout_ms
+
+    async def _perform(self, user):
+        if self.kind == "sequence":
+            for child in self.children:
+                await child._perform(user)
+            return
+        work = self._run(user)
+        if not self.timeout_ms:
+            await work
+            return
+        try:
+            await asyncio.wait_for(work, self.timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"{self.span} exceeded its {self.timeout_ms} ms budget") from None
+
+    def _time_left_ms(self, started):
+        """What is left of the step budget for its render wait: action and render share one deadline."""
+        if not self.timeout_ms:
+            return None
+        left_ms = self.timeout_ms - (time.monotonic() - started) * 1000
+        if left_ms <= 0:
+            raise asyncio.TimeoutError(f"{self.span} exceeded its {self.timeout_ms} ms budget")
+        return left_ms
+
+    async def run(self, user):
+        if self.kind == "think":
+            await user.think.pause(user.page, user.spans)
+            return
+        try:
+            with user.spans.span(self.span):
+                if self.kind == "group":
+                    for child in self.children:
+                        await child.run(user)
+                    return
+                started = time.monotonic()
+                await self._perform(user)
+                if self.render:
+                    await user.render.wait_for_render(self._time_left_ms(started))
+        except Exception as e:
+            if not self.optional:
+                raise
+            logger.warning(f"[User {user.user_id}] ⚠️ {self.span} failed, continuing: {e}")
+
+
+def _action_key(raw):
+    keys = [key for key in raw if key not in STEP_OPTIONS and key not in ("steps", "sequence")]
+    if "group" in raw or "think" in raw or "sequence" in raw:
+        return "group" if "group" in raw else "think" if "think" in raw else "sequence"
+    if len(keys) != 1 or keys[0] not in ACTIONS:
+        raise ValueError(f"Step must have exactly one of {sorted(ACTIONS)}: {raw}")
+    return keys[0]
+
+
+def step_budget(span, budgets):
+    """Timeout budget (ms) of a span name: an exact entry of `timeouts.steps`, else the first matching pattern."""
+    if not budgets or span is None:
+        return None
+    if span in budgets:
+        return budgets[span]
+    return next((ms for pattern, ms in budgets.items() if fnmatchcase(span, pattern)), None)
+
+
+def _cap_timeouts(steps, max_timeout_ms, navigation_timeout_ms=None):
+    for step in steps:
+        cap = navigation_timeout_ms if step.kind == "open_report" and navigation_timeout_ms else max_timeout_ms
+        if step.timeout_ms:
+            step.timeout_ms = min(step.timeout_ms, cap)
+        _cap_timeouts(step.children, max_timeout_ms, navigation_timeout_ms)
+
+
+def bind_steps(page, named, raw_steps, budgets=None):
+    return [bind_step(page, named, raw, budgets) for raw in raw_steps if raw.get("when", True)]
+
+
+def bind_step(page, named, raw, budgets=None):
+    kind = _action_key(raw)
+    if kind == "think":
+        return Step("think")
+    optional = raw.get("optional", False)
+    if kind == "group":
+        return Step("group", span=raw["group"], children=bind_steps(page, named, raw["steps"], budgets),
+                    optional=optional)
+    if kind == "sequence":
+        span = raw.get("span", "sequence")
+        children = bind_steps(page, named, raw["sequence"], budgets)
+        return Step("sequence", span=span, children=children, render=raw.get("render", True), optional=optional,
+                    timeout_ms=raw.get("timeout_ms") or step_budget(span, budgets))
+    factory, default_span, render = ACTIONS[kind]
+    arg = raw[kind]
+    span = raw.get("span") or default_span or (f"{kind}:{describe(arg)}" if kind in ("click", "clicks", "buttons") else kind)
+    return Step(kind, span=span, run=factory(page, named, arg), render=raw.get("render", render), optional=optional,
+                timeout_ms=raw.get("timeout_ms") or step_budget(span, budgets))
+
+
+def _check_steps(raw_steps, fragments):
+    for raw in raw_steps:
+        if "include" in raw:
+            if raw["include"] not in fragments:
+                raise ValueError(f"Unknown fragment {raw['include']!r}")
+            continue
+        _action_key(raw)
+        for key in ("steps", "sequence"):
+            if key in raw:
+                _check_steps(raw[key], fragments)
+
+
+def _expand(raw_steps, fragments):
+    steps = []
+    for raw in raw_steps:
+        if "include" in raw:
+            steps.extend(_expand(fragments[raw["include"]], fragments))
+            continue
+        raw = dict(raw)
+        for key in ("steps", "sequence"):
+            if key in raw:
+                raw[key] = _expand(raw[key], fragments)
+        steps.append(raw)
+    return steps
+
+
+def _uses_item_codes(raw_steps):
+    for raw in raw_steps:
+        if isinstance(raw.get("fill"), dict) and raw["fill"].get("item_codes"):
+            return True
+        if any(_uses_item_codes(raw[key]) for key in ("steps", "sequence") if key in raw):
+            return True
+    return False
+
+
+def substitute(value, variables):
+    """Replace ${name} with scenario variables; a value that is exactly ${name} takes the variable's type."""
+    if isinstance(value, dict):
+        return {k: substitute(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute(v, variables) for v in value]
+    if isinstance(value, str):
+        whole = VAR_PATTERN.fullmatch(value)
+        if whole:
+            return variables[whole.group(1)]
+        return VAR_PATTERN.sub(lambda m: str(variables[m.group(1)]), value)
+    return value
+
+
+def _read_yaml(path):
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+class Scenario:
+    """A declarative scenario file resolved against one report, ready to bind to pages.
+
+    scenarios/<name>.yaml holds `steps` (plus optional `vars`, `pools`, `locators`,
+    `think_time` and `timeouts`); scenarios/common.yaml holds the shared locators, step
+    fragments, value pools and per-step timeout budgets and scenarios/reports.yaml maps report names to URLs, so any
+    scenario runs against any report. In a cold-cache run every user/iteration slot
+    replaces the vars that have a pool with its own draw.
+    """
+
+    def __init__(self, name, report, report_url, steps, locators, values, pools, think_time, timeout_ms,
+                 navigation_timeout_ms, cache_mode=CACHE_MODE, step_timeouts=None):
+        self.name = name
+        self.report = report
+        self.report_url = report_url
+        self.steps = steps
+        self.locators = locators
+        self.values = values
+        self.pools = ParameterPools(pools) if cache_mode == "cold" and pools else None
+        self.cache_mode = cache_mode
+        self.think_time = think_time
+        self.timeout_ms = timeout_ms
+        self.navigation_timeout_ms = navigation_timeout_ms
+        self.step_timeouts = step_timeouts or {}  # span name or pattern -> ms
+        self.resolve()  # fail at collection on undefined variables
+
+    @classmethod
+    def load(cls, name, report, variables=None, think_time=None, scenario_dir=SCENARIO_DIR, cache_mode=CACHE_MODE):
+        scenario_dir = Path(scenario_dir)
+        common = _read_yaml(scenario_dir / COMMON_FILE)
+        reports = _read_yaml(scenario_dir / REPORTS_FILE)
+        data = _read_yaml(scenario_dir / f"{name}.yaml")
+        fragments = common.get("fragments", {})
+        _check_steps(data["steps"], fragments)
+        values = {**data.get("vars", {}), **(variables or {})}
+        pools = {key: spec for key, spec in {**common.get("pools", {}), **data.get("pools", {})}.items() if key in values}
+        timeouts = data.get("timeouts", {})
+        step_timeouts = {**common.get("timeouts", {}).get("steps", {}), **timeouts.get("steps", {})}
+        return cls(
+            name, report, reports.get(report, report), _expand(data["steps"], fragments),
+            {**common.get("locators", {}), **data.get("locators", {})}, values, pools,
+            {**data.get("think_time", {}), **(think_time or {})},
+            timeouts.get("default_ms", DEFAULT_TIMEOUT_MS), timeouts.get("navigation_ms", DEFAULT_TIMEOUT_MS),
+            cache_mode, step_timeouts,
+        )
+
+    def draw(self, slot):
+        """The pooled variable values of a user/iteration slot; empty in a warm-cache run."""
+        return self.pools.draw(slot) if self.pools and slot is not None else {}
+
+    def resolve(self, slot=None):
+        """Steps and locators with the variables substituted for one user/iteration slot."""
+        values = {**self.values, **self.draw(slot)}
+        try:
+            return substitute(self.steps, values), substitute(self.locators, values)
+        except KeyError as e:
+            raise ValueError(f"Scenario {self.name} uses undefined variable {e}") from None
+
+    @property
+    def uses_item_codes(self):
+        return _uses_item_codes(self.steps)
+
+    def bind(self, page, slot=None, max_timeout_ms=None, navigation_timeout_ms=None):
+        """Build every locator once for this page and return the bound steps.
+
+        max_timeout_ms caps every step budget (the pre-flight's short timeouts), and
+        navigation_timeout_ms the budget of opening the report and signing in.
+        """
+        steps, locators = self.resolve(slot)
+        named = {}
+        for key, spec in locators.items():
+            named[key] = build_locator(page, spec, named)
+        bound = bind_steps(page, named, steps, self.step_timeouts)
+        if max_timeout_ms:
+            _cap_timeouts(bound, max_timeout_ms, navigation_timeout_ms)
+        return bound
+
+
+class RunAborted(Exception):
+    """The controller's circuit breaker stopped the run."""
+
+
+async def run_steps(steps, user):
+    for step in steps:
+        await step.run(user)
+
+
+async def until_aborted(work, results_sink):
+    """Await work, cancelling it as soon as the controller aborts the run."""
+    task = asyncio.ensure_future(work)
+    abort = asyncio.ensure_future(results_sink.aborted.wait())
+    try:
+        await asyncio.wait({task, abort}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        abort.cancel()
+        if not task.done():
+            task.cancel(f"Run aborted: {results_sink.abort_reason}")
+            await asyncio.gather(task, return_exceptions=True)
+    if task.cancelled():
+        raise RunAborted(results_sink.abort_reason)
+    return task.result()
+
+
+class VirtualUser:
+    """Per-user runtime state the bound steps act on."""
+
+    def __init__(self, user_id, page, report_url, username, password, spans, render, think, slot=None, iteration=0):
+        self.user_id = user_id
+        self.slot = slot  # dense 0-based user/iteration number within the test
+        self.iteration = iteration
+        self.page = page
+        self.report_url = report_url
+        self.username = username
+        self.password = password
+        self.spans = spans
+        self.render = render
+        self.think = think
+
+
+async def run_user(scenario, user_id, browser_pool, results_sink, test_name, number_of_users, output_dir,
+                   user_index=None, start_at=None, stop_at=None, iterations=ITERATIONS, duration_s=DURATION_S,
+                   account=None, session=None):
+    """Run one virtual user through the scenario in its own pooled browser context.
+
+    With start_at (epoch seconds) the user waits, browser ready, until that start time.
+    The user then runs `iterations` iterations, or keeps starting new ones until stop_at
+    (a load profile's ramp-down) or for duration_s seconds (soak mode), on the same
+    signed-in page; every row carries its iteration number and a failed iteration does not
+    end the loop. "start"/"stop" user events let the controller count the active users.
+    The user's account is leased from the credential pool until it is done, unless the
+    caller already leased one and passes its (username, password) as account. An open-model
+    arrival passes its session number, which gives the session its own HAR and think times.
+    """
+    if results_sink.aborted.is_set():
+        pytest.skip(f"Run aborted: {results_sink.abort_reason}")
+    async with user_credentials(user_id) if account is None else nullcontext(account) as (username, password):
+        async with browser_pool.context(storage_state=AUTH_CACHE.load(username), ignore_https_errors=True,
+                                        bypass_csp=True, **har_options(output_dir, current_run_id(), user_id, session),
+                                        locale='en-US', user_agent='PlaywrightTestAgent') as context:
+            page = await context.new_page()
+            page.set_default_navigation_timeout(scenario.navigation_timeout_ms)
+            page.set_default_timeout(scenario.timeout_ms)
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            write_row = results_sink.recorder("span", test_name, number_of_users)
+            spans = SpanRecorder(user_id, write_row)
+            render = RenderWatcher(page, scenario.timeout_ms)
+            NetworkProbe(page, user_id, spans, results_sink.recorder("query", test_name, number_of_users))
+            think = ThinkTime(user_id, **scenario.think_time, session=session)
+
+            if not username or not password:
+                logger.error(f"❌ [User {user_id}] Missing credentials in environment variables.")
+                write_row([timestamp, user_id, "Missing credentials", "N/A", SCENARIO_STEP, "N/A", 0])
+                return
+
+            if start_at and start_at > time.time():
+                logger.info(f"[User {user_id}] ⏳ Waiting {start_at - time.time():.0f} s for its start time")
+                await asyncio.sleep(start_at - time.time())
+
+            if stop_at:
+                deadline, loop = stop_at, f"looping until {datetime.fromtimestamp(stop_at):%H:%M:%S}"
+            elif duration_s:
+                deadline, loop = time.time() + duration_s, f"looping for {duration_s} s"
+            else:
+                deadline, loop = None, f"{iterations} iteration(s)"
+            logger.info(f"[User {user_id}] Scenario {scenario.name} on {scenario.report}, {scenario.cache_mode} "
+                        f"cache, think time: {think.dist}, seed {think.seed}, {loop}")
+            user_event = results_sink.recorder("user", test_name, number_of_users)
+            user_event([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user_id, "start", 0])
+            iteration = 0
+            try:
+                while not results_sink.aborted.is_set():
+                    if await _run_iteration(scenario, user_id, page, username, password, spans, render, think,
+                                            results_sink, number_of_users, user_index, iteration):
+                        break
+                    iteration += 1
+                    if (time.time() >= deadline) if deadline else iteration >= iterations:
+                        break
+            finally:
+                user_event([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user_id, "stop", iteration])
+                await page.close()
+
+
+async def _js_heap(page):
+    try:
+        return await page.evaluate(JS_HEAP_JS)
+    except Exception:
+        return None
+
+
+async def _run_iteration(scenario, user_id, page, username, password, spans, render, think, results_sink,
+                         number_of_users, user_index, iteration):
+    """One pass through the scenario; True when the run was aborted."""
+    # Dense user/iteration number for disjoint item codes and cold-cache filter draws
+    slot = None if user_index is None else iteration * number_of_users + user_index
+    spans.iteration = iteration
+    user = VirtualUser(user_id, page, scenario.report_url, username, password, spans, render, think, slot, iteration)
+    try:
+        if iteration:
+            logger.info(f"[User {user_id}] 🔁 Iteration {iteration + 1}")
+        if scenario.pools:
+            if slot >= scenario.pools.combinations:
+                logger.warning(f"[User {user_id}] ⚠️ Only {scenario.pools.combinations} distinct filter sets, "
+                               f"slot {slot} repeats one")
+            logger.info(f"[User {user_id}] 🧊 Cold cache filters: {scenario.draw(slot)}")
+        steps = scenario.bind(page, slot)
+        with spans.span(SCENARIO_STEP):
+            await until_aborted(run_steps(steps, user), results_sink)
+        heap = await _js_heap(page)
+        logger.info(f"✅ [User {user_id}] Loaded in {spans.last_duration_ms} ms"
+                    + (f", JS heap {heap / 2 ** 20:.0f} MB" if heap else ""))
+    except RunAborted as e:
+        logger.warning(f"🛑 [User {user_id}] Stopped, run aborted: {e}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ [User {user_id}] Failed: {e}")
+    return False
+
+
+async def run_arrivals(scenario, user_ids, browser_pool, results_sink, test_name, number_of_users, output_dir,
+                       worker=0, workers=1, rate_per_min=ARRIVAL_RATE_PER_MIN, duration_s=ARRIVAL_DURATION_S,
+                       max_in_flight=ARRIVAL_MAX_IN_FLIGHT, process=ARRIVAL_PROCESS):
+    """Open model: start report sessions at an arrival rate instead of running a fixed set of users.
+
+    Each arrival waits for a free in-flight slot, a free credential of this worker's share
+    of user_ids and its leased account, then runs one iteration of the scenario in a fresh context. The wait since
+    its scheduled arrival is recorded as a `queue` row next to the session's `scenario`
+    (service time) row, so queueing shows up on its own once demand exceeds the capacity.
+    """
+    credentials = asyncio.Queue()
+    for user_id in user_ids[worker::workers]:
+        credentials.put_nowait(user_id)
+    if credentials.empty():
+        pytest.skip(f"No credentials left for arrival worker {worker} of {workers}")
+    cap = max(1, max_in_flight // workers)
+    in_flight = asyncio.Semaphore(cap)
+    write_row = results_sink.recorder("span", test_name, number_of_users)
+    start = run_start_at() or time.time()
+    logger.info(f"🚪 Arrival worker {worker}: {process} arrivals at {rate_per_min / workers:g}/min for {duration_s} s, "
+                f"{credentials.qsize()} credentials, up to {cap} sessions in flight")
+
+    async def session(number, arrival):
+        async with in_flight:
+            user_id = await credentials.get()
+            try:
+                # Waiting for a leased account (e.g. one still cooling down) is queueing too
+                async with user_credentials(user_id) as account:
+                    queue_ms = round((time.time() - arrival) * 1000, 1)
+                    write_row([datetime.fromtimestamp(arrival).strftime("%Y-%m-%d %H:%M:%S"), user_id, "Success",
+                               queue_ms, QUEUE_STEP, 0, 0])
+                    if not results_sink.aborted.is_set():
+                        await run_user(scenario, user_id, browser_pool, results_sink, test_name, number_of_users,
+                                       output_dir, number, iterations=1, duration_s=0, account=account,
+                                       session=number)
+            except Exception as e:
+                # e.g. no browser context could be opened: the session counts as a failed scenario
+                logger.error(f"❌ [User {user_id}] Arrival session {number} failed: {e}")
+                write_row([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user_id, f"Failed: {e}", "N/A",
+                           SCENARIO_STEP, "N/A", 0])
+            finally:
+                credentials.put_nowait(user_id)
+
+    sessions = []
+    try:
+        for number, offset in enumerate(arrival_offsets(rate_per_min, duration_s, process,
+                                                        ARRIVAL_SEED or current_run_id(), worker, workers)):
+            await until_aborted(asyncio.sleep(max(0, start + offset - time.time())), results_sink)
+            sessions.append(asyncio.create_task(session(number * workers + worker, start + offset)))
+    except RunAborted as e:
+        logger.warning(f"🛑 Arrival worker {worker} stopped, run aborted: {e}")
+    logger.info(f"🚪 Arrival worker {worker}: {len(sessions)} sessions arrived, waiting for them to finish")
+    # Every session runs to its end (and closes its context) whatever happens to the others
+    results = await asyncio.gather(*sessions, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException) and not isinstance(r, pytest.skip.Exception)]
+    if errors:
+        logger.error(f"❌ Arrival worker {worker}: {len(errors)} session(s) ended with an error, first: {errors[0]!r}")
+
+
+def _check_profile(number_of_users):
+    profile = active_profile()
+    if profile and profile.peak > number_of_users:
+        logger.warning(f"⚠️ Load profile {profile.name} peaks at {profile.peak} users but the test has {number_of_users}")
+
+
+def _check_item_codes(scenario, number_of_users):
+    """Fail at collection if a disjoint (e.g. cold-cache) run needs more item-code samples than the list holds.
+
+    A looping run (DURATION_S, load profile) is only checked for its first iteration; later
+    ones that run out repeat earlier samples with a warning.
+    """
+    if not ITEM_CODES_DISJOINT or not scenario.uses_item_codes:
+        return
+    slots = number_of_users if DURATION_S or LOAD_PROFILE else number_of_users * ITERATIONS
+    sampler = item_code_sampler()
+    if slots > sampler.disjoint_slots:
+        raise ValueError(f"Scenario {scenario.name} needs {slots} disjoint item-code samples ({number_of_users} users"
+                         f" x {1 if DURATION_S or LOAD_PROFILE else ITERATIONS} iteration(s)), but "
+                         f"{len(sampler.codes)} codes only make {sampler.disjoint_slots} of {sampler.sample_size}: "
+                         f"add codes, lower SAMPLE_SIZE or the users, or set ITEM_CODES_DISJOINT=false in a warm run")
+
+
+def _release_window(release_index):
+    """(start_at, stop_at) of the release_index-th user; skips users the load profile never needs."""
+    window = release_window(release_index)
+    if window is None:
+        pytest.skip(f"Load profile {LOAD_PROFILE} never needs user #{release_index + 1}")
+    return window
+
+
+async def released_user(release_index, scenario, user_id, *args):
+    """run_user in the load-profile window of the release_index-th user."""
+    start_at, stop_at = _release_window(release_index)
+    await run_user(scenario, user_id, *args, start_at=start_at, stop_at=stop_at)
+
+
+def user_groups(members, size=USERS_PER_WORKER):
+    """members in groups of size: each group is one test, so one worker runs its users side by side."""
+    return [members[i:i + size] for i in range(0, len(members), size)]
+
+
+def group_id(labels):
+    return f"{labels[0]}..{labels[-1]}" if len(labels) > 1 else str(labels[0])
+
+
+async def run_users(users):
+    """Run {label: user coroutine} concurrently on the worker's browser pool.
+
+    Every user runs to its end even if another one fails; the first failure is raised
+    afterwards, and the test is skipped only if all of its users were.
+    """
+    results = await asyncio.gather(*users.values(), return_exceptions=True)
+    failures = []
+    for label, result in zip(users, results):
+        if isinstance(result, BaseException) and not isinstance(result, pytest.skip.Exception):
+            logger.error(f"❌ [User {label}] Ended with an error: {result!r}")
+            failures.append(result)
+    if failures:
+        raise failures[0]
+    if all(isinstance(result, pytest.skip.Exception) for result in results):
+        pytest.skip(str(results[0]))
+
+
+def scenario_test(test_file, scenario, report, user_ids, variables=None, think_time=None):
+    """The test_powerbi_load function for a thin test module.
+
+    Results go to <test module>/number_of_users=N through the run's results sink, exactly
+    as for the hand-written modules this replaces (<test module>@cold/... in a cold-cache run).
+    Each test runs a group of USERS_PER_WORKER users concurrently on its worker's browser
+    pool, so N users need `pytest -n ceil(N / USERS_PER_WORKER)`.
+    """
+    test_name = tagged_test(Path(test_file).stem)
+    user_ids, share = run_user_ids(user_ids)  # share: this agent's users in a distributed run
+    number_of_users = len(user_ids)
+    if ARRIVAL_RATE_PER_MIN:
+        test_name, number_of_users = open_test_name(test_name), ARRIVAL_MAX_IN_FLIGHT
+    output_dir = Path(test_file).resolve().parent / test_name / f"number_of_users={number_of_users}"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    loaded = Scenario.load(scenario, report, variables, think_time)
+
+    if ARRIVAL_RATE_PER_MIN:
+        # One arrival loop per process; `pytest -n W --dist each` splits the rate over W workers
+        @pytest.mark.asyncio(loop_scope="session")
+        async def test_powerbi_load(browser_pool, results_sink, request):
+            await run_arrivals(loaded, share, browser_pool, results_sink, test_name, number_of_users, output_dir,
+                               *worker_share(request.config))
+
+        test_powerbi_load.preflight = [(loaded, share[0])] if share else []
+        return test_powerbi_load
+
+    _check_profile(number_of_users)
+    _check_item_codes(loaded, number_of_users)
+
+    groups = user_groups(share)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    @pytest.mark.parametrize("users", groups, ids=[group_id(group) for group in groups])  # Simulate n users
+    async def test_powerbi_load(users, browser_pool, results_sink):
+        await run_users({user_id: released_user(user_ids.index(user_id), loaded, user_id, browser_pool, results_sink,
+                                                test_name, number_of_users, output_dir, user_ids.index(user_id))
+                         for user_id in users})
+
+    test_powerbi_load.preflight = [(loaded, share[0])] if share else []
+    return test_powerbi_load
+
+
+def mix_test(mix_name=None, total_users=None):
+    """The test_powerbi_load function of test_workload_mix.py: every entry of a workload mix.
+
+    The mix (WORKLOAD_MIX, set by workload_mix.py) is one parametrized test over groups
+    of (entry, user_id) in release order, so all entries share one run, one results sink and, through
+    RUN_START_AT, one start time. Each entry writes to mix_<mix>.<entry>/number_of_users=N
+    with N the total users of the mix, the load level its latencies were measured at.
+    Under a load profile the entries' users are released interleaved, in proportion.
+    """
+    mix_name = mix_name or os.getenv("WORKLOAD_MIX")
+    members, entries, number_of_users = [], {}, 0
+    if mix_name:
+        mix = load_mix(mix_name)
+        allocation = allocate_users(mix, total_users or os.getenv("WORKLOAD_USERS"))
+        number_of_users = sum(len(ids) for ids in allocation.values())
+        for name, ids in allocation.items():
+            entry = mix["entries"][name]
+            test_name = tagged_test(mix_test_name(mix_name, name))
+            output_dir = RESULTS_ROOT / test_name / f"number_of_users={number_of_users}"
+            output_dir.mkdir(parents=True, exist_ok=True)
+            scenario = Scenario.load(entry["scenario"], entry["report"], entry.get("vars"), entry.get("think_time"))
+            entries[name] = (scenario, test_name, output_dir, ids)
+            members += [(name, user_id) for user_id in ids]
+        _check_profile(number_of_users)
+        for scenario, _, _, _ in entries.values():
+            _check_item_codes(scenario, number_of_users)
+    release = sorted(members, key=lambda m: (entries[m[0]][3].index(m[1]) + 0.5) / len(entries[m[0]][3]))
+
+    groups = user_groups(release)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    @pytest.mark.parametrize("members", groups,
+                             ids=[group_id([f"{name}-{user_id}" for name, user_id in group]) for group in groups])
+    async def test_powerbi_load(members, browser_pool, results_sink):
+        users = {}
+        for entry, user_id in members:
+            scenario, test_name, output_dir, user_ids = entries[entry]
+            users[f"{entry}-{user_id}"] = released_user(release.index((entry, user_id)), scenario, user_id,
+                                                        browser_pool, results_sink, test_name, number_of_users,
+                                                        output_dir, user_ids.index(user_id))
+        await run_users(users)
+
+    test_powerbi_load.preflight = [(scenario, user_ids[0]) for scenario, _, _, user_ids in entries.values() if user_ids]
+    return test_powerbi_load
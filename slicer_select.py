@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+# How long the slicer may take to reflect the clicks before the selection is reported as incomplete
+VERIFY_TIMEOUT_MS = 5000
+VERIFY_POLL_MS = 100
+
+# Shared by both scripts: find each named item among the open slicer's [role] elements
+FIND_ITEMS_JS = """
+const label = el => (el.getAttribute('aria-label') ?? el.textContent).trim();
+const items = [...document.querySelectorAll(`[role="${role}"]`)];
+const find = name => items.find(el => label(el) === name)
+    ?? (exact ? undefined : items.find(el => label(el).toLowerCase().includes(name.toLowerCase())));
+"""
+
+# Clicks every named item in one evaluation; returns the names that are not rendered
+SELECT_ITEMS_JS = f"""
+({{ names, role, inner, exact, ctrl }}) => {{
+    {FIND_ITEMS_JS}
+    const missing = [];
+    for (const name of names) {{
+        const item = find(name);
+        if (!item) {{ missing.push(name); continue; }}
+        const target = (inner && item.querySelector(inner)) || item;
+        target.scrollIntoView({{ block: 'nearest' }});
+        for (const type of ['pointerdown', 'mousedown', 'pointerup', 'mouseup', 'click']) {{
+            const Event = type.startsWith('pointer') ? PointerEvent : MouseEvent;
+            target.dispatchEvent(new Event(type, {{ bubbles: true, cancelable: true, view: window, ctrlKey: ctrl }}));
+        }}
+    }}
+    return missing;
+}}
+"""
+
+# Names whose item is missing or not (yet) aria-selected / aria-checked
+UNSELECTED_ITEMS_JS = f"""
+({{ names, role, exact }}) => {{
+    {FIND_ITEMS_JS}
+    const selected = el => el && [el, ...el.querySelectorAll('[aria-selected], [aria-checked]')]
+        .some(e => e.getAttribute('aria-selected') === 'true' || e.getAttribute('aria-checked') === 'true');
+    return names.filter(name => !selected(find(name)));
+}}
+"""
+
+
+async def select_items(page, names, role="option", inner="div span", exact=False, ctrl=False,
+                       verify_timeout_ms=VERIFY_TIMEOUT_MS):
+    """Select several items of an open slicer in one round trip and verify the result once.
+
+    Items the slicer has not rendered (long virtualized lists) are clicked through regular
+    locators instead. Returns the names that are still not selected after verify_timeout_ms;
+    verify_timeout_ms=None skips the check (toggling flows that never end fully selected).
+    """
+    args = {"names": list(names), "role": role, "inner": inner, "exact": bool(exact), "ctrl": bool(ctrl)}
+    missing = await page.evaluate(SELECT_ITEMS_JS, args)
+    for name in missing:
+        option = page.get_by_role(role, name=name, exact=exact)
+        await (option.locator(inner).first if inner else option).click(modifiers=["Control"] if ctrl else None)
+    if verify_timeout_ms is None:
+        return []
+
+    deadline = time.monotonic() + verify_timeout_ms / 1000
+    while True:
+        unselected = await page.evaluate(UNSELECTED_ITEMS_JS, args)
+        if not unselected or time.monotonic() >= deadline:
+            return unselected
+        await asyncio.sleep(VERIFY_POLL_MS / 1000)
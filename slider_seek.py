@@ -0,0 +1,142 @@
+import asyncio
+from datetime import datetime
+
+SLIDER_DATE_FORMAT = "%d/%m/%Y"
+# Read-and-correct rounds after the computed key presses before falling back to stepping
+MAX_CORRECTIONS = 3
+# Fine steps the fallback may take, each followed by a read (the old loop allowed 200)
+FALLBACK_STEPS = 40
+# Remaining steps above which one PageUp/PageDown is spent to learn the coarse step size
+COARSE_THRESHOLD = 10
+# Lets the slider apply the last key press before its value is read back
+SETTLE_MS = 100
+
+# aria-valuemin/max/now and aria-valuetext in one round trip
+SLIDER_STATE_JS = """
+el => ({
+    min: parseFloat(el.getAttribute('aria-valuemin')),
+    max: parseFloat(el.getAttribute('aria-valuemax')),
+    now: parseFloat(el.getAttribute('aria-valuenow')),
+    text: el.getAttribute('aria-valuetext'),
+})
+"""
+
+
+def position(text, date_format=SLIDER_DATE_FORMAT):
+    """Comparable position of a slider value: the day number of a date, else the number itself."""
+    try:
+        return datetime.strptime(text, date_format).toordinal()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+class SliderSeek:
+    """Moves an ARIA slider to a target aria-valuetext with as few round trips as possible.
+
+    The slider state is read once, one fine and (for long distances) one coarse key press
+    calibrate the step sizes, and the rest of the distance is covered with Home/End,
+    PageUp/PageDown and arrow presses without reading in between. The value is verified
+    at the end and corrected a few times; only then does it fall back to stepping with a
+    read after every press, bounded by FALLBACK_STEPS.
+    """
+
+    def __init__(self, slider, date_format=SLIDER_DATE_FORMAT, max_corrections=MAX_CORRECTIONS,
+                 fallback_steps=FALLBACK_STEPS):
+        self.slider = slider
+        self.keyboard = slider.page.keyboard
+        self.date_format = date_format
+        self.max_corrections = max_corrections
+        self.fallback_steps = fallback_steps
+        self.fine_step = None    # position units per arrow press
+        self.fine_now = None     # aria-valuenow units per arrow press
+        self.coarse_steps = {}   # key -> arrow presses per PageUp/PageDown
+        self.presses = 0
+        self.reads = 0
+
+    async def _state(self):
+        if self.presses:
+            await asyncio.sleep(SETTLE_MS / 1000)
+        self.reads += 1
+        state = await self.slider.evaluate(SLIDER_STATE_JS)
+        state["position"] = position(state["text"], self.date_format)
+        return state
+
+    async def _press(self, key, times=1):
+        for _ in range(times):
+            await self.keyboard.press(key)
+        self.presses += times
+
+    async def _calibrate(self, state, fine):
+        """Press one fine step and learn its size; None when the slider did not move."""
+        await self._press(fine)
+        after = await self._state()
+        moved = abs((after["position"] or 0) - (state["position"] or 0))
+        if not moved:
+            return None
+        self.fine_step = moved
+        self.fine_now = abs(after["now"] - state["now"]) or None
+        return after
+
+    def _steps_to_edge(self, state, direction):
+        if not self.fine_now or state["now"] != state["now"]:  # NaN: no aria-valuenow
+            return None
+        bound = state["min"] if direction < 0 else state["max"]
+        if bound != bound:
+            return None
+        return round(abs(state["now"] - bound) / self.fine_now)
+
+    async def seek(self, target):
+        """Move to target; True once aria-valuetext equals it."""
+        goal = position(target, self.date_format)
+        if goal is None:
+            raise ValueError(f"Slider target {target!r} is neither a {self.date_format} date nor a number")
+        await self.slider.focus()
+        state = await self._state()
+        for _ in range(self.max_corrections + 1):
+            if state["text"] == target:
+                return True
+            if state["position"] is None:
+                break
+            direction = -1 if goal < state["position"] else 1
+            fine, coarse, edge = ("ArrowLeft", "PageDown", "Home") if direction < 0 else ("ArrowRight", "PageUp", "End")
+            if self.fine_step is None:
+                state = await self._calibrate(state, fine)
+                if state is None:
+                    return False
+                continue
+            remaining = round(abs(goal - state["position"]) / self.fine_step)
+            to_edge = self._steps_to_edge(state, direction)
+            if to_edge == 0 and remaining:
+                return False  # target lies beyond the slider's range
+            if to_edge is not None and remaining >= to_edge:
+                await self._press(edge)
+            else:
+                if remaining > COARSE_THRESHOLD and coarse not in self.coarse_steps:
+                    await self._press(coarse)
+                    after = await self._state()
+                    self.coarse_steps[coarse] = round(abs(after["position"] - state["position"]) / self.fine_step)
+                    state = after
+                    remaining = round(abs(goal - state["position"]) / self.fine_step)
+                    if remaining and (goal < state["position"]) != (direction < 0):
+                        continue  # the coarse step overshot, correct from the other side
+                page = self.coarse_steps.get(coarse) or 0
+                if page > 0:
+                    await self._press(coarse, remaining // page)
+                    remaining %= page
+                await self._press(fine, remaining)
+            state = await self._state()
+        return await self._step_fallback(target, goal, state)
+
+    async def _step_fallback(self, target, goal, state):
+        for _ in range(self.fallback_steps):
+            if state["text"] == target:
+                return True
+            if state["position"] is None:
+                return False
+            await self._press("ArrowLeft" if goal < state["position"] else "ArrowRight")
+            state = await self._state()
+        return state["text"] == target
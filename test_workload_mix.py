@@ -0,0 +1,5 @@
+from scenario_engine import mix_test
+
+# The mix, its users and the shared start time come from `python workload_mix.py <mix>`;
+# collected on its own this module has no tests
+test_powerbi_load = mix_test()
@@ -0,0 +1,90 @@
+import json
+import time
+import asyncio
+from credential_pool import CredentialPool
+
+ACCOUNTS = [(1, "user1@example.com", "pw1"), (2, "user2@example.com", "pw2"), (3, "user3@example.com", None)]
+
+
+def make_pool(tmp_path, **kwargs):
+    return CredentialPool(ACCOUNTS, lease_dir=tmp_path, **{"lease_s": 60, "cooldown_s": 0, "wait_s": 0, **kwargs})
+
+
+def write_lease(pool, username, expires, token="other"):
+    pool.path(username).write_text(json.dumps({"token": token, "expires": expires}), encoding="utf-8")
+
+
+def test_accounts_without_password_are_ignored(tmp_path):
+    assert sorted(make_pool(tmp_path).accounts) == [1, 2]
+
+
+def test_a_leased_account_is_not_leased_twice(tmp_path):
+    pool = make_pool(tmp_path)
+    lease = pool.try_acquire(1, user_id=1)
+    assert lease and lease.owned()
+    assert make_pool(tmp_path).try_acquire(1, user_id=7) is None
+
+
+def test_acquire_prefers_the_users_own_account(tmp_path):
+    pool = make_pool(tmp_path)
+    assert asyncio.run(pool.acquire(2)).account_id == 2
+    assert asyncio.run(pool.acquire(2)).account_id == 1
+    assert asyncio.run(pool.acquire(2)) is None  # every account is leased and wait_s is 0
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    pool = make_pool(tmp_path)
+    write_lease(pool, "user1@example.com", time.time() - 1)
+    lease = pool.try_acquire(1, user_id=1)
+    assert lease and lease.owned()
+    assert not list(tmp_path.glob("*.stale"))
+
+
+def test_take_over_puts_back_a_lease_that_is_not_expired(tmp_path):
+    # Another process renewed the lease between the expiry check and the rename
+    pool = make_pool(tmp_path)
+    write_lease(pool, "user1@example.com", time.time() + 60, token="fresh")
+    path = pool.path("user1@example.com")
+    assert pool._take_over(path) is False
+    assert json.loads(path.read_text(encoding="utf-8"))["token"] == "fresh"
+    assert not list(tmp_path.glob("*.stale"))
+
+
+def test_half_written_lease_counts_by_its_age(tmp_path):
+    pool = make_pool(tmp_path)
+    path = pool.path("user1@example.com")
+    path.write_text("{", encoding="utf-8")
+    assert pool.try_acquire(1, user_id=1) is None
+    # Older than lease_s: left behind by a crash while writing
+    assert make_pool(tmp_path, lease_s=-1).try_acquire(1, user_id=1)
+
+
+def test_released_account_cools_down(tmp_path):
+    pool = make_pool(tmp_path)
+    pool.try_acquire(1, user_id=1).release(cooldown_s=60)
+    assert pool.try_acquire(1, user_id=2) is None
+    pool.path("user1@example.com").unlink()
+    pool.try_acquire(1, user_id=2).release(cooldown_s=0)
+    assert not pool.path("user1@example.com").exists()
+
+
+def test_renew_fails_once_the_lease_was_lost(tmp_path):
+    pool = make_pool(tmp_path)
+    lease = pool.try_acquire(1, user_id=1)
+    assert lease.renew()
+    write_lease(pool, "user1@example.com", time.time() + 60)
+    assert not lease.renew()
+    lease.release(cooldown_s=0)  # must not delete the new holder's lease
+    assert pool.path("user1@example.com").exists()
+
+
+def test_lease_context_yields_credentials_and_releases(tmp_path):
+    pool = make_pool(tmp_path)
+
+    async def use():
+        async with pool.lease(1) as credentials:
+            assert pool.path("user1@example.com").exists()
+            return credentials
+
+    assert asyncio.run(use()) == ("user1@example.com", "pw1")
+    assert not pool.path("user1@example.com").exists()
@@ -0,0 +1,49 @@
+from item_codes import ItemCodes, ItemCodeSampler
+
+CODES = ItemCodes([f"{i:06d}" for i in range(100)])
+
+
+def test_numeric_codes_keep_their_leading_zeros(tmp_path):
+    path = tmp_path / "codes.csv"
+    path.write_text("\ufeff000123\n\n004567,extra\n", encoding="utf-8")
+    codes = ItemCodes.load(path)
+    assert len(codes) == 2
+    assert [codes[0], codes[1]] == ["000123", "004567"]
+
+
+def test_mixed_codes_are_kept_as_text():
+    codes = ItemCodes(["A1", "0007", "B22"])
+    assert [codes[i] for i in range(3)] == ["A1", "0007", "B22"]
+
+
+def test_samples_are_reproducible_per_user_and_iteration():
+    sampler = ItemCodeSampler(CODES, seed="run", sample_size=10, disjoint=False)
+    again = ItemCodeSampler(CODES, seed="run", sample_size=10, disjoint=False)
+    assert sampler.sample(1) == again.sample(1)
+    assert sampler.sample(1) != sampler.sample(2)
+    assert sampler.sample(1, iteration=1) != sampler.sample(1)
+    assert len(set(sampler.sample(3))) == 10
+
+
+def test_disjoint_slots_never_share_a_code():
+    sampler = ItemCodeSampler(CODES, seed="run", sample_size=10, disjoint=True)
+    assert sampler.disjoint_slots == 10
+    samples = [sampler.sample(user_id=0, slot=slot) for slot in range(sampler.disjoint_slots)]
+    codes = [code for sample in samples for code in sample]
+    assert len(codes) == len(set(codes)) == 100
+
+
+def test_disjoint_slots_wrap_around_once_the_list_runs_out(caplog):
+    sampler = ItemCodeSampler(CODES, seed="run", sample_size=30, disjoint=True)
+    assert sampler.disjoint_slots == 3
+    assert sampler.sample(0, slot=3) == sampler.sample(0, slot=0)
+    assert sampler.sample(0, slot=4) == sampler.sample(0, slot=1)
+    assert sum("disjoint samples" in record.message for record in caplog.records) == 1
+
+
+def test_sample_larger_than_the_list_is_rejected():
+    try:
+        ItemCodeSampler(CODES, seed="run", sample_size=101)
+    except ValueError:
+        return
+    assert False, "a sample larger than the list must be rejected"
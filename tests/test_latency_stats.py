@@ -0,0 +1,79 @@
+from latency_stats import LatencyHistogram, StepStats, SummaryBuilder
+
+
+def test_percentiles_within_histogram_precision():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms)
+    for p in (50, 90, 95, 99):
+        # Reported values are at or just above the true percentile, within 2 / 2**8
+        assert p * 10 <= hist.percentile(p) <= p * 10 * (1 + 2 / 256)
+    assert hist.percentile(100) == hist.max_ms == 1000
+    assert hist.mean_ms == 500.5
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram()
+    for ms in (0.001, 0.1, 0.255):
+        hist.record(ms)
+    assert [hist.percentile(p) for p in (1, 50, 100)] == [0.001, 0.1, 0.255]
+
+
+def test_empty_histogram():
+    hist = LatencyHistogram()
+    assert hist.percentile(50) is None
+    assert hist.max_ms is None and hist.mean_ms is None
+
+
+def test_merge_equals_recording_everything_in_one():
+    a, b, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for ms in range(1, 500):
+        a.record(ms * 1.7)
+        combined.record(ms * 1.7)
+    for ms in range(1, 300):
+        b.record(ms * 13.1)
+        combined.record(ms * 13.1)
+    a.merge(b)
+    assert a.counts == combined.counts
+    assert (a.total, a.sum_us, a.min_us, a.max_us) == (combined.total, combined.sum_us, combined.min_us,
+                                                       combined.max_us)
+
+
+def test_merge_rejects_other_precision():
+    try:
+        LatencyHistogram(8).merge(LatencyHistogram(10))
+    except ValueError:
+        return
+    assert False, "merging histograms of different precision must fail"
+
+
+def test_histogram_round_trips_through_dict():
+    hist = LatencyHistogram()
+    for ms in (3, 30, 300, 3000):
+        hist.record(ms)
+    restored = LatencyHistogram.from_dict(hist.to_dict())
+    assert restored.counts == hist.counts
+    assert restored.percentile(75) == hist.percentile(75)
+
+
+def test_step_stats_counts_errors_and_active_windows():
+    stats = StepStats()
+    stats.add("2024-01-01 10:00:00", "Success", "1000")
+    stats.add("2024-01-01 10:00:09", "Success", "1000")
+    stats.add("2024-01-01 10:00:05", "Failed: Timeout", "N/A")
+    # A second burst a day later is its own window, not a day of idle time
+    stats.add("2024-01-02 10:00:00", "Success", "2000")
+    summary = stats.summary()
+    assert summary["count"] == 4 and summary["errors"] == 1 and summary["error_rate"] == 0.25
+    assert stats.active_seconds == 12
+    assert summary["throughput_per_s"] == round(3 / 12, 4)
+
+
+def test_summary_builders_merge_like_one():
+    rows = [("t", 5, "scenario", f"2024-01-01 10:00:{i:02d}", "Success", str(100 + i)) for i in range(20)]
+    whole, first, second = SummaryBuilder(), SummaryBuilder(), SummaryBuilder()
+    for i, row in enumerate(rows):
+        whole.add(*row)
+        (first if i % 2 else second).add(*row)
+    assert list(first.merge(second).rows()) == list(whole.rows())
+    assert list(SummaryBuilder.from_dict(whole.to_dict()).rows()) == list(whole.rows())
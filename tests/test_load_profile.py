@@ -0,0 +1,50 @@
+from load_profile import LoadProfile, parse_duration, release_window
+
+# +5 users/min up to 50, hold 20 min, ramp down over 10 min (scenarios/profiles/ramp_50.yaml)
+RAMP_50 = LoadProfile([{"duration": "10m", "target": 50}, {"duration": "20m", "target": 50},
+                       {"duration": "10m", "target": 0}], "ramp_50")
+
+
+def test_parse_duration():
+    assert [parse_duration(v) for v in (90, "90s", "10m", "1.5h", " 2m ")] == [90, 90, 600, 5400, 120]
+    for bad in ("10 minutes", "", "-5s"):
+        try:
+            parse_duration(bad)
+        except ValueError:
+            continue
+        assert False, f"{bad!r} must be rejected"
+
+
+def test_target_follows_the_stages():
+    assert RAMP_50.duration_s == 2400 and RAMP_50.peak == 50
+    assert [RAMP_50.target_at(t) for t in (0, 300, 600, 1500, 2100, 2400)] == [0, 25, 50, 50, 25, 0]
+
+
+def test_windows_of_first_and_last_user():
+    assert RAMP_50.window(0) == (12, 1800 + 588)
+    assert RAMP_50.window(49) == (600, 1800)
+    assert RAMP_50.window(50) is None
+
+
+def test_window_without_ramp_down_lasts_to_the_end():
+    profile = LoadProfile([{"duration": "1m", "target": 10}, {"duration": "5m", "target": 10}])
+    assert profile.window(9) == (60, 360)
+
+
+def test_active_users_match_the_target():
+    for t in range(0, 2400, 37):
+        active = sum(1 for i in range(60) if RAMP_50.window(i) and RAMP_50.window(i)[0] <= t < RAMP_50.window(i)[1])
+        assert abs(active - RAMP_50.target_at(t)) <= 1
+
+
+def test_release_window():
+    assert release_window(3, RAMP_50, start_at=1000) == (1000 + 48, 1000 + 1800 + 552)
+    assert release_window(50, RAMP_50, start_at=1000) is None
+
+
+def test_empty_profile_is_rejected():
+    try:
+        LoadProfile([])
+    except ValueError:
+        return
+    assert False, "a profile without stages must be rejected"
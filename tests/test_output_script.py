@@ -0,0 +1,58 @@
+from output_script import consolidate, manifest_path
+
+HEADER = "timestamp,user_id,status,duration_ms,step\n"
+
+
+def write_log(root, rows, name="performance_logs_run1.csv", mode="w"):
+    path = root / "test_x" / "number_of_users=2" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open(mode, encoding="utf-8") as f:
+        if mode == "w":
+            f.write(HEADER)
+        f.writelines(f"2024-01-01 10:00:0{i},{i},Success,{100 + i},{step}\n" for i, step in rows)
+    return path
+
+
+def lines(path):
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+def test_only_new_and_grown_logs_are_appended(tmp_path):
+    write_log(tmp_path, [(1, "scenario"), (2, "open_report")])
+    assert consolidate(tmp_path) == 1
+    assert consolidate(tmp_path) == 0
+    write_log(tmp_path, [(3, "scenario")], mode="a")
+    write_log(tmp_path, [(4, "scenario")], name="performance_logs_run2.csv")
+    assert consolidate(tmp_path) == 2
+    assert lines(tmp_path / "consolidated_output.txt") == [
+        "test_x,2,2024-01-01 10:00:01,1,Success,101",
+        "test_x,2,2024-01-01 10:00:03,3,Success,103",
+        "test_x,2,2024-01-01 10:00:04,4,Success,104",
+    ]
+
+
+def test_output_without_manifest_is_rebuilt_not_duplicated(tmp_path):
+    # A fresh checkout: the output is committed, its manifest is not
+    write_log(tmp_path, [(1, "scenario")])
+    consolidate(tmp_path)
+    output = tmp_path / "consolidated_output.txt"
+    manifest_path(output).unlink()
+    assert consolidate(tmp_path) == 1
+    assert lines(output) == ["test_x,2,2024-01-01 10:00:01,1,Success,101"]
+
+
+def test_each_output_keeps_its_own_manifest(tmp_path):
+    write_log(tmp_path, [(1, "scenario")])
+    consolidate(tmp_path)
+    other = tmp_path / "elsewhere" / "other.txt"
+    other.parent.mkdir()
+    assert consolidate(tmp_path, other) == 1
+    assert lines(other) == ["test_x,2,2024-01-01 10:00:01,1,Success,101"]
+    assert manifest_path(other).exists()
+
+
+def test_rebuild_rewrites_the_output(tmp_path):
+    write_log(tmp_path, [(1, "scenario")])
+    consolidate(tmp_path)
+    assert consolidate(tmp_path, rebuild=True) == 1
+    assert len(lines(tmp_path / "consolidated_output.txt")) == 1
@@ -0,0 +1,55 @@
+import math
+from latency_stats import StepStats
+from scalability import fit_usl, usl_latency, knee, max_users_within, analyze_test
+
+PARAMS = (1000.0, 50.0, 5.0)
+
+
+def test_fit_recovers_usl_parameters():
+    points = [(n, usl_latency(PARAMS, n)) for n in (1, 5, 10, 20, 40)]
+    for fitted, expected in zip(fit_usl(points), PARAMS):
+        assert math.isclose(fitted, expected, rel_tol=1e-6)
+
+
+def test_flat_curve_has_no_coherency_cost():
+    a, b, c = fit_usl([(1, 100), (10, 100), (20, 100)])
+    assert math.isclose(a, 100) and b == 0 and c == 0
+    assert knee((a, b, c)) == math.inf
+
+
+def test_fit_needs_two_concurrency_levels():
+    assert fit_usl([(10, 100), (10, 120)]) is None
+
+
+def test_knee():
+    a, b, c = PARAMS
+    assert math.isclose(knee(PARAMS), math.sqrt((1 - b / a) / (c / a)))
+    assert knee((100.0, 100.0, 1.0)) == 1.0  # all contention: no gain from a second user
+
+
+def test_max_users_within_sla():
+    sla_ms = 5000
+    n = max_users_within(PARAMS, sla_ms)
+    assert usl_latency(PARAMS, n) <= sla_ms < usl_latency(PARAMS, n + 1)
+    assert max_users_within(PARAMS, 999) == 0
+    assert max_users_within((100.0, 10.0, 0.0), 200) == 11
+    assert max_users_within((100.0, 0.0, 0.0), 200) == math.inf
+
+
+def _stats(latency_ms, samples=50, errors=0):
+    stats = StepStats()
+    for i in range(samples):
+        stats.add(f"2024-01-01 10:{i // 60:02d}:{i % 60:02d}", "Success", latency_ms)
+    for _ in range(errors):
+        stats.add("2024-01-01 10:00:00", "Failed", "N/A")
+    return stats
+
+
+def test_analyze_stops_at_the_first_level_that_misses_the_sla():
+    levels = {n: _stats(usl_latency(PARAMS, n)) for n in (1, 10, 20, 40)}
+    levels[10] = _stats(usl_latency(PARAMS, 10), errors=5)  # 10% errors breaks a 1% error budget
+    result = analyze_test(levels, sla_ms=20000, metric_name="p95", max_error_rate=0.01, bootstrap=10)
+    assert result["observed_max_users"] == 1
+    assert result["levels"] == 4 and result["params"] is not None
+    low, high = result["knee_ci"]
+    assert low <= high
@@ -0,0 +1,57 @@
+import time
+from timing import SpanRecorder, SCENARIO_STEP
+
+
+def recorder():
+    rows = []
+    return SpanRecorder(7, rows.append), rows
+
+
+def test_nested_spans_report_their_path():
+    spans, rows = recorder()
+    with spans.span(SCENARIO_STEP):
+        with spans.span("page"):
+            with spans.span("drill_down"):
+                assert spans.current_step == "page/drill_down"
+    assert [row[4] for row in rows] == ["page/drill_down", "page", SCENARIO_STEP]
+    assert all(row[1] == 7 and row[2] == "Success" for row in rows)
+    assert spans.current_step is None
+
+
+def test_think_time_is_excluded_and_credited_to_the_next_step():
+    spans, rows = recorder()
+    with spans.span(SCENARIO_STEP):
+        with spans.thinking():
+            time.sleep(0.05)
+        with spans.span("click"):
+            pass
+    click, scenario = rows
+    assert click[5] >= 50 and click[3] < 50
+    assert scenario[5] >= 50 and scenario[3] < 50
+
+
+def test_nested_spans_of_the_same_name_keep_their_own_think_time():
+    spans, rows = recorder()
+    with spans.span("a"):
+        with spans.span("a"):
+            with spans.thinking():
+                time.sleep(0.02)
+        with spans.thinking():
+            time.sleep(0.02)
+    inner, outer = rows
+    assert 20 <= inner[5] < 40
+    assert outer[5] >= 40
+    assert spans.current_step is None
+
+
+def test_failed_span_records_the_error_and_reraises():
+    spans, rows = recorder()
+    try:
+        with spans.span("click"):
+            raise TimeoutError("locator timed out")
+    except TimeoutError:
+        pass
+    else:
+        assert False, "the span must re-raise"
+    assert rows[0][2] == "Failed: locator timed out"
+    assert spans.current_step is None
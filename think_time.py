@@ -0,0 +1,80 @@
+import os
+import csv
+import math
+import random
+import logging
+from results_sink import current_run_id
+
+# Think-time model; unset MIN/MAX/MEAN values fall back to the scenario's defaults
+THINK_TIME_DIST = os.getenv("THINK_TIME_DIST", "uniform")  # uniform | exponential | lognormal | replay
+THINK_TIME_MIN_MS = os.getenv("THINK_TIME_MIN_MS")
+THINK_TIME_MAX_MS = os.getenv("THINK_TIME_MAX_MS")
+THINK_TIME_MEAN_MS = os.getenv("THINK_TIME_MEAN_MS")
+THINK_TIME_SIGMA = float(os.getenv("THINK_TIME_SIGMA", "0.5"))
+THINK_TIME_REPLAY_FILE = os.getenv("THINK_TIME_REPLAY_FILE", "think_times.csv")
+THINK_TIME_SEED = os.getenv("THINK_TIME_SEED")  # default: the run id, so a run's pauses can be reproduced
+
+DISTRIBUTIONS = ("uniform", "exponential", "lognormal", "replay")
+
+logger = logging.getLogger(__name__)
+_replay_cache = {}
+
+
+def load_replay_samples(path):
+    """Think times in ms observed from real usage: first column of a CSV, one value per row."""
+    if path not in _replay_cache:
+        with open(path, newline="", encoding="utf-8") as f:
+            samples = []
+            for row in csv.reader(f):
+                try:
+                    samples.append(float(row[0]))
+                except (IndexError, ValueError):
+                    continue  # header or blank line
+        if not samples:
+            raise ValueError(f"No think-time samples found in {path}")
+        _replay_cache[path] = samples
+    return _replay_cache[path]
+
+
+class ThinkTime:
+    """Seeded, per-user think-time distribution applied between scenario steps.
+
+    The scenario passes its own defaults (e.g. 60–120 s); the THINK_TIME_* environment
+    variables override them for a run. The same seed and user id (and session, for the
+    many sessions one credential serves in an open-model run) always produce the same
+    sequence of pauses.
+    """
+
+    def __init__(self, user_id, dist=THINK_TIME_DIST, min_ms=60000, max_ms=120000, mean_ms=None,
+                 sigma=THINK_TIME_SIGMA, replay_file=THINK_TIME_REPLAY_FILE, seed=None, session=None):
+        if dist not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown think-time distribution {dist!r}, expected one of {DISTRIBUTIONS}")
+        self.dist = dist
+        self.min_ms = int(THINK_TIME_MIN_MS or min_ms)
+        self.max_ms = int(THINK_TIME_MAX_MS or max_ms)
+        self.mean_ms = float(THINK_TIME_MEAN_MS or mean_ms or (self.min_ms + self.max_ms) / 2)
+        self.sigma = sigma
+        self.replay_file = replay_file
+        self.seed = str(seed or THINK_TIME_SEED or current_run_id())
+        self._rng = random.Random(f"{self.seed}/{user_id}" + (f"/{session}" if session is not None else ""))
+
+    def sample(self):
+        """Next think time in ms."""
+        if self.dist == "uniform":
+            return self._rng.randint(self.min_ms, self.max_ms)
+        if self.dist == "exponential":
+            value = self._rng.expovariate(1 / self.mean_ms)
+        elif self.dist == "lognormal":
+            mu = math.log(self.mean_ms) - self.sigma ** 2 / 2
+            value = self._rng.lognormvariate(mu, self.sigma)
+        else:
+            value = self._rng.choice(load_replay_samples(self.replay_file))
+        # Long tails are capped so one pause cannot stall a whole load window
+        return int(min(value, self.max_ms * 2))
+
+    async def pause(self, page, spans):
+        """Think between steps; the pause is excluded from every open span."""
+        think_ms = self.sample()
+        with spans.thinking():
+            await page.wait_for_timeout(think_ms)
+        return think_ms
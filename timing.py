@@ -0,0 +1,72 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+SCENARIO_STEP = "scenario"
+
+
+class SpanRecorder:
+    """Named, nestable timing spans for one virtual user.
+
+    Every span is measured with the monotonic time.perf_counter_ns() clock and handed to
+    `on_record` as its own result row when it closes:
+
+        [timestamp, user_id, status, duration_ms, step, think_ms, iteration]
+
+    Nested spans are reported with their full path, e.g. "Σύγκριση Πωλήσεων/drill_down",
+    so the same operation on different report pages stays distinguishable. The end-to-end
+    SCENARIO_STEP span is not part of that path.
+
+    Think time taken inside `thinking()` is excluded from every open span. A span's
+    think_ms is the think time taken right before it plus whatever was excluded from it,
+    so the scenario row carries the user's total think time.
+    """
+
+    def __init__(self, user_id, on_record):
+        self.user_id = user_id
+        self.on_record = on_record
+        self.last_duration_ms = None
+        self.iteration = 0  # the scenario iteration of a looping virtual user
+        self._stack = []  # [name, excluded think ns] per open span
+        self._pending_think_ns = 0
+
+    @property
+    def current_step(self):
+        names = [name for name, _ in self._stack]
+        return "/".join(name for name in names if name != SCENARIO_STEP) or (SCENARIO_STEP if names else None)
+
+    @contextmanager
+    def span(self, name):
+        frame = [name, 0]
+        self._stack.append(frame)
+        step = self.current_step
+        think_before_ns, self._pending_think_ns = self._pending_think_ns, 0
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException as e:
+            self._emit(timestamp, f"Failed: {e}", start, step, frame[1], think_before_ns)
+            raise
+        else:
+            self._emit(timestamp, "Success", start, step, frame[1], think_before_ns)
+        finally:
+            self._stack.pop()
+
+    @contextmanager
+    def thinking(self):
+        """Exclude the wrapped pause from all open spans and credit it to the next step."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            for frame in self._stack:
+                frame[1] += elapsed
+            self._pending_think_ns += elapsed
+
+    def _emit(self, timestamp, status, start, step, excluded_ns, think_before_ns):
+        duration_ms = round((time.perf_counter_ns() - start - excluded_ns) / 1_000_000, 1)
+        think_ms = round((think_before_ns + excluded_ns) / 1_000_000, 1)
+        self.last_duration_ms = duration_ms
+        self.on_record([timestamp, self.user_id, status, duration_ms, step, think_ms, self.iteration])
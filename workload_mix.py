@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+import yaml
+from results_sink import RUN_ID_FORMAT
+from latency_stats import SummaryBuilder, StepStats, SCENARIO_STEP
+from load_profile import START_DELAY_S
+from browser_pool import workers_for
+
+MIX_DIR = Path(__file__).resolve().parent / "scenarios" / "mixes"
+MIX_TEST_FILE = "test_workload_mix.py"
+
+
+def load_mix(name, mix_dir=MIX_DIR):
+    with open(Path(mix_dir) / f"{name}.yaml", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def allocate_users(mix, total_users=None):
+    """{entry: user ids} for a mix: fixed `users` counts first, `weight`s share the rest of `users`.
+
+    Weighted shares use largest remainders so they always add up. Credential ids are
+    handed out consecutively from each entry's `first_user` (default: after the previous
+    entry), so no account is shared between two virtual users.
+    """
+    entries = mix["entries"]
+    total = int(total_users or mix.get("users") or 0)
+    counts = {name: int(entry["users"]) for name, entry in entries.items() if "users" in entry}
+    weighted = {name: float(entry["weight"]) for name, entry in entries.items() if "users" not in entry}
+    remaining = total - sum(counts.values())
+    if weighted:
+        if remaining <= 0:
+            raise ValueError(f"Mix needs users > {sum(counts.values())} to give the weighted entries any users")
+        weight_sum = sum(weighted.values())
+        shares = {name: remaining * w / weight_sum for name, w in weighted.items()}
+        counts.update({name: int(share) for name, share in shares.items()})
+        leftover = remaining - sum(int(share) for share in shares.values())
+        for name in sorted(shares, key=lambda n: shares[n] - int(shares[n]), reverse=True)[:leftover]:
+            counts[name] += 1
+    user_ids, next_user = {}, 1
+    for name, entry in entries.items():
+        first = int(entry.get("first_user", next_user))
+        user_ids[name] = list(range(first, first + counts[name]))
+        next_user = first + counts[name]
+    return user_ids
+
+
+def mix_test_name(mix_name, entry_name):
+    return f"mix_{mix_name}.{entry_name}"
+
+
+def mix_summary(builder, mix_name):
+    """Rows of (test, scenario stats) per mix entry plus the combined row for the whole mix."""
+    prefix = mix_test_name(mix_name, "")
+    combined = StepStats()
+    rows = []
+    for (test, _, step), stats in sorted(builder.groups.items()):
+        if step == SCENARIO_STEP and test.split("@")[0].startswith(prefix):
+            rows.append((test, stats.summary()))
+            combined.merge(stats)
+    rows.append((f"mix_{mix_name} (all)", combined.summary()))
+    return rows
+
+
+def print_summary(rows, file=sys.stdout):
+    print(f"{'entry':<60} {'count':>6} {'errors':>6} {'p50_ms':>10} {'p95_ms':>10} {'throughput/s':>12}", file=file)
+    for test, s in rows:
+        print(f"{test:<60} {s['count']:>6} {s['errors']:>6} {s['p50_ms'] or '-':>10} {s['p95_ms'] or '-':>10} "
+              f"{s['throughput_per_s'] or '-':>12}", file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run several scenarios as one weighted workload with a shared start time")
+    parser.add_argument("mix", help="name of a scenarios/mixes/<mix>.yaml file")
+    parser.add_argument("--users", type=int, help="total virtual users (default: the mix file's `users`)")
+    parser.add_argument("--start-delay", type=int, default=START_DELAY_S,
+                        help="seconds from launch to the shared start, enough for every worker to open its browser")
+    # Everything after -- goes to pytest unchanged
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args, extra = parser.parse_args(argv[:split]), argv[split + 1:]
+
+    allocation = allocate_users(load_mix(args.mix), args.users)
+    total = sum(len(ids) for ids in allocation.values())
+    for name, ids in allocation.items():
+        print(f"{name}: {len(ids)} users ({ids[0] if ids else '-'}..{ids[-1] if ids else '-'})")
+    run_id = os.environ.setdefault("PERF_RUN_ID", time.strftime(RUN_ID_FORMAT))
+    # conftest sets the shared RUN_START_AT once the pre-flight has passed
+    os.environ.update(WORKLOAD_MIX=args.mix, WORKLOAD_USERS=str(total), START_DELAY_S=str(args.start_delay))
+    result = subprocess.run([sys.executable, "-m", "pytest", "-n", str(workers_for(total)), MIX_TEST_FILE, *extra],
+                            cwd=Path(__file__).resolve().parent)
+
+    histograms = Path(__file__).resolve().parent / "runs" / f"{run_id}_histograms.json"
+    if histograms.exists():
+        builder = SummaryBuilder.from_dict(json.loads(histograms.read_text(encoding="utf-8")))
+        print_summary(mix_summary(builder, args.mix))
+    sys.exit(result.returncode)